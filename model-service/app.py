@@ -1,7 +1,8 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query
 from fastapi import Request
 from fastapi.responses import JSONResponse
-from contextlib import asynccontextmanager #For lifecycle management
+from contextlib import asynccontextmanager, suppress #For lifecycle management
+import asyncio
 import json
 import uvicorn
 from fastapi import Query
@@ -9,15 +10,21 @@ from fastapi import Query
 
 # ── own modules ───────────────────────────────────────────
 from config.mongoDB import db, mongo_client
-from retrieval import load_faqs_from_mongodb
+from retrieval import load_faqs_from_mongodb, embedding_engine
+from retrieval.faq_watcher import watch_faq_changes
+from retrieval.embedding_batcher import embedding_batcher
 from classes.interface import RagRequest
 from classes.interface import BookingSession
 from classes.interface import BookingList
 from controllers.chatbot_controller import handle_chatbot
 from controllers.anomaly_detection_controller import anomaly_detection_booking_session, anomaly_detection_booking
 from models import stream_llm
+from models.llm import open_llm_session, close_llm_session
+from models.response_pool import response_pool
 from utils import chunkedStream
 from utils.dialogflow.bookings_function import track_booking
+from utils import metrics
+from utils.conversation_dispatcher import ConversationDispatcher
 
 # ───────────────────────────────────────────────────────────────
 
@@ -26,10 +33,26 @@ from anyio import to_thread
 async def lifespan(app: FastAPI):
     """Populate vector store once, when the service boots."""
     print("[INIT] Initializing FAQ vector store …")
-    # load_faqs_from_mongodb is sync; run in threadpool so it
-    # doesn’t block the event loop.
-    await load_faqs_from_mongodb(db) #Because loading function is synchronous and will block the main thread, it is put into the thread pool for execution.
+    # One pooled keep-alive HTTP session for every Ollama generation
+    await open_llm_session()
+    # Warm-starts from disk when the corpus is unchanged; rebuilds run in a worker thread
+    await load_faqs_from_mongodb(db)
+    # A warm start never touches the encoder, so load MiniLM now rather than on the first guest query
+    await asyncio.to_thread(embedding_engine.encode, "warm up")
+    # Keep the FAQ index in sync with admin edits while the service runs
+    faq_watcher_task = asyncio.create_task(watch_faq_changes(db["faqs"]))
+    # Pre-generate and periodically refresh the fallback / handoff replies
+    response_pool_task = asyncio.create_task(response_pool.run_refresh())
     yield #yield pauses the function's execution and returns a value to the caller
+    faq_watcher_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await faq_watcher_task
+    response_pool_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await response_pool_task
+    await response_pool.close()
+    await embedding_batcher.close()
+    await close_llm_session()
     mongo_client.close()
     print("[SHUTDOWN] MongoDB connection closed.")
 
@@ -56,30 +79,29 @@ async def webhook_endpoint(request: Request):
 @app.websocket("/bot-reply-ws")
 async def websocket_endpoint(ws: WebSocket):
     await ws.accept()
+    # Each conversation runs in its own task, so one slow LLM answer no longer blocks other guests
+    dispatcher = ConversationDispatcher(handle_chatbot, ws.send_json)
     try:
         while True:
             payload = await ws.receive_json()  # received a dictionaries
             print(f"payload: {payload}")
             conversation_id = payload.get("conversationId")
             question = payload.get("question")
-            context = payload.get("context", "")
-            senderId = payload.get("senderId")
-            senderType = payload.get("senderType")
 
             if not question or not conversation_id:
-                await ws.send_json({"error": "question and conversationId Required"})
+                dispatcher.post({"error": "question and conversationId Required"})
                 continue
 
-            # Let handle_chatbot generate streaming responses
-            async for token, is_final in handle_chatbot(payload):
-                print(f"token: {token}, {is_final}")
-                await ws.send_json({
-                    "conversationId": conversation_id,
-                    "token": token,
-                    "isFinal": is_final
-                })
+            # Let handle_chatbot generate streaming responses, in order per conversation
+            dispatcher.submit(payload)
     except WebSocketDisconnect:
         print("customer sider disconnect")
+    finally:
+        await dispatcher.close()
+
+@app.get("/metrics")
+def get_metrics():
+    return metrics.snapshot()
 
 @app.post("/predict")
 def predict_booking_session_anomaly(session: BookingSession):
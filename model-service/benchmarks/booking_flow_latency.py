@@ -0,0 +1,94 @@
+"""
+Latency of the seven booking-flow prompts with every step rephrased by the
+LLM vs. the per-step modes in constants/FSM_constant.STEP_MODES (template
+steps rendered locally).
+
+Drives handle_booking_flow through steps 0-6 with canned guest answers, the
+way handle_chatbot does, stopping before the booking is created. Needs the
+service's Redis, MongoDB (room types) and Ollama (LLM_URL); a scratch
+conversationId is used and its keys are deleted afterwards.
+
+Run from the model-service directory:
+    python -m benchmarks.booking_flow_latency
+    python -m benchmarks.booking_flow_latency --rounds 3
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from config.redis import redis_client
+from constants import FSM_constant
+from controllers.chatbot_controller import handle_booking_flow
+from models.llm import close_llm_session
+
+ANSWERS = [
+    "I'd like to book a room",
+    "12/08/2025",
+    "15/08/2025",
+    "deluxe",
+    "Jane Tan",
+    "jane.tan@example.com",
+    "+60 12-345 6789",
+]
+
+
+async def run_flow():
+    conversation_id = f"bench-{uuid.uuid4()}"
+    steps = []
+    try:
+        for step, answer in enumerate(ANSWERS):
+            current_state = await redis_client.get(conversation_id)
+            start = time.perf_counter()
+            first = None
+            async for token, is_final in handle_booking_flow(
+                conversationId=conversation_id,
+                user_input=answer,
+                senderType="guest",
+                senderId="bench",
+                step=step,
+                current_state=current_state,
+            ):
+                if first is None and token:
+                    first = time.perf_counter() - start
+            steps.append((first, time.perf_counter() - start))
+    finally:
+        await redis_client.delete(conversation_id, f"{conversation_id}:entities", f"{conversation_id}:context")
+    return steps
+
+
+async def measure(rounds: int):
+    flows = [await run_flow() for _ in range(rounds)]
+    per_step = list(zip(*flows))
+    return [
+        (statistics.mean(s[0] for s in samples), statistics.mean(s[1] for s in samples))
+        for samples in per_step
+    ]
+
+
+async def main(rounds: int):
+    configured = dict(FSM_constant.STEP_MODES)
+    results = {}
+    try:
+        FSM_constant.STEP_MODES.update({step: FSM_constant.LLM_MODE for step in configured})
+        results["all steps via LLM"] = await measure(rounds)
+        FSM_constant.STEP_MODES.update(configured)
+        results["STEP_MODES"] = await measure(rounds)
+    finally:
+        FSM_constant.STEP_MODES.update(configured)
+        await close_llm_session()
+
+    steps = FSM_constant.FSM["booking"]
+    print(f"mean of {rounds} flows, seconds: first token / full reply")
+    print(f"{'step':<36}" + "".join(f"{name:>26}" for name in results))
+    for i, step in enumerate(steps):
+        label = f"{step} ({configured.get(step, FSM_constant.DEFAULT_STEP_MODE)})"
+        print(f"{label:<36}" + "".join(f"{r[i][0]:>12.3f} / {r[i][1]:>9.3f}" for r in results.values()))
+    print(f"{'whole flow':<36}" + "".join(f"{sum(s[1] for s in r):>26.3f}" for r in results.values()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=1)
+    asyncio.run(main(parser.parse_args().rounds))
@@ -0,0 +1,64 @@
+"""
+Query-encode throughput with and without the embedding micro-batcher.
+
+Each client sends REQUESTS_PER_CLIENT distinct questions back to back. The
+"direct" path runs one batch-size-1 encode per request in a worker thread
+(the old find_best_faq behaviour); the "batched" path goes through
+EmbeddingBatcher.
+
+Run from the model-service directory:
+    python -m benchmarks.embedding_batcher_throughput [--max-wait-ms 5] [--max-batch-size 32]
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from retrieval.embedding import embedding_engine
+from retrieval.embedding_batcher import EmbeddingBatcher
+
+CONCURRENCY_LEVELS = (1, 8, 32, 128)
+REQUESTS_PER_CLIENT = 20
+
+
+def load_questions():
+    with open("data/faq.json", encoding="utf-8") as f:
+        return [row["text"] for row in json.load(f)]
+
+
+async def direct_encode(text):
+    return await asyncio.to_thread(embedding_engine.encode, text)
+
+
+async def run(encode, clients, questions):
+    async def client(n):
+        for i in range(REQUESTS_PER_CLIENT):
+            # Distinct text per request so nothing benefits from caching
+            await encode(f"{questions[(n + i) % len(questions)]} #{n}-{i}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in range(clients)))
+    elapsed = time.perf_counter() - start
+    return clients * REQUESTS_PER_CLIENT / elapsed
+
+
+async def main(max_wait_ms, max_batch_size):
+    questions = load_questions()
+    embedding_engine.encode("warm up")
+    batcher = EmbeddingBatcher(max_wait_ms=max_wait_ms, max_batch_size=max_batch_size)
+
+    print(f"max_wait_ms={max_wait_ms} max_batch_size={max_batch_size}")
+    print(f"{'clients':>7} {'direct (req/s)':>15} {'batched (req/s)':>16} {'speed-up':>9}")
+    for clients in CONCURRENCY_LEVELS:
+        direct = await run(direct_encode, clients, questions)
+        batched = await run(batcher.encode, clients, questions)
+        print(f"{clients:>7} {direct:>15.1f} {batched:>16.1f} {batched / direct:>8.2f}x")
+    await batcher.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.max_wait_ms, args.max_batch_size))
@@ -0,0 +1,94 @@
+"""
+Startup time and resident memory: shared embedding engine vs. the old layout.
+
+The old layout loaded all-MiniLM-L6-v2 once per module inside the server
+process (retrieval/embedding.py, retrieval/faq_search.py and the former
+utils/calculate_consine_similarity.py). Each variant runs in a fresh
+interpreter so the numbers are not polluted by the other one.
+
+Run from the model-service directory:
+    python -m benchmarks.embedding_startup
+"""
+import importlib.util
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def run_legacy():
+    from sentence_transformers import SentenceTransformer
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    models = [
+        SentenceTransformer("all-MiniLM-L6-v2"),
+        HuggingFaceEmbeddings(model_name=MODEL_NAME),
+        HuggingFaceEmbeddings(model_name=MODEL_NAME),
+    ]
+    models[0].encode("warm up")
+    models[1].embed_query("warm up")
+    models[2].embed_query("warm up")
+    return len(models)
+
+
+def run_shared():
+    # Load the module file directly so the retrieval package __init__ (MongoDB,
+    # intent model, …) does not skew the memory numbers.
+    spec = importlib.util.spec_from_file_location("shared_embedding", "retrieval/embedding.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    from benchmarks.langchain_adapter import SharedEmbeddings
+    embedding_engine = module.embedding_engine
+    langchain_embeddings = SharedEmbeddings(embedding_engine)
+
+    # Same three call sites, one set of weights
+    embedding_engine.encode("warm up")
+    langchain_embeddings.embed_query("warm up")
+    embedding_engine.encode_batch(["warm up", "warm up"])
+    return 1
+
+
+def child(variant: str):
+    baseline_rss = current_rss_mb()
+    start = time.perf_counter()
+    loads = run_legacy() if variant == "legacy" else run_shared()
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "variant": variant,
+        "model_loads": loads,
+        "startup_s": round(elapsed, 3),
+        "rss_mb": round(current_rss_mb(), 1),
+        "rss_delta_mb": round(current_rss_mb() - baseline_rss, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }))
+
+
+def main():
+    results = []
+    for variant in ("legacy", "shared"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.embedding_startup", "--child", variant],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'variant':<8} {'loads':>5} {'startup (s)':>12} {'rss (MB)':>10} {'peak (MB)':>10}")
+    for r in results:
+        print(f"{r['variant']:<8} {r['model_loads']:>5} {r['startup_s']:>12} {r['rss_mb']:>10} {r['peak_rss_mb']:>10}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        child(sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,230 @@
+"""
+End-to-end check of the FAQ change-stream watcher.
+
+Seeds a faqs collection, builds the index, starts watch_faq_changes, then
+inserts, edits and deletes FAQs and checks that search results follow
+(an answer-only edit must keep the FAQ's vector).
+The watcher is then stopped, more edits are made while it is down, and a
+restarted watcher must catch up from the stored resume token. Finally the
+collection is dropped: the index must empty out once, without a rebuild
+loop, and FAQs inserted afterwards must still be picked up.
+
+By default an in-memory stand-in for the Motor collection is used. Pass a
+replica-set URI to run against a real MongoDB (a scratch database is used):
+    python -m benchmarks.faq_change_stream_check
+    python -m benchmarks.faq_change_stream_check --uri "mongodb://localhost:27017/?replicaSet=rs0"
+"""
+import argparse
+import asyncio
+import tempfile
+
+from bson import ObjectId
+
+from retrieval import faq_search
+from retrieval.faq_watcher import watch_faq_changes
+
+
+class InMemoryCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    async def to_list(self, length=None):
+        return list(self.docs)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class InMemoryChangeStream:
+    def __init__(self, collection, start: int):
+        self.collection = collection
+        self.position = start
+
+    @property
+    def resume_token(self):
+        return {"_data": str(self.position - 1)}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def try_next(self):
+        if self.position < len(self.collection.oplog):
+            return self._next_event()
+        return None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        async with self.collection.changed:
+            await self.collection.changed.wait_for(lambda: self.position < len(self.collection.oplog))
+        return self._next_event()
+
+    def _next_event(self):
+        event = self.collection.oplog[self.position]
+        self.position += 1
+        return event
+
+
+class InMemoryFaqCollection:
+    """The subset of the Motor collection API used by the FAQ index and watcher."""
+
+    def __init__(self):
+        self.docs = {}
+        self.oplog = []
+        self.changed = asyncio.Condition()
+        self.database = self
+
+    def __getitem__(self, name):
+        return self
+
+    def find(self, filter=None, projection=None):
+        return InMemoryCursor([dict(doc) for doc in self.docs.values()])
+
+    def aggregate(self, pipeline):
+        return InMemoryCursor([{"count": len(self.docs), "maxUpdatedAt": None, "missingUpdatedAt": len(self.docs)}])
+
+    def watch(self, full_document=None, resume_after=None):
+        start = int(resume_after["_data"]) + 1 if resume_after else len(self.oplog)
+        return InMemoryChangeStream(self, start)
+
+    async def _log(self, operation, doc_id=None):
+        event = {"_id": {"_data": str(len(self.oplog))}, "operationType": operation}
+        if doc_id is not None:
+            event["documentKey"] = {"_id": doc_id}
+            event["fullDocument"] = dict(self.docs[doc_id]) if doc_id in self.docs else None
+        self.oplog.append(event)
+        async with self.changed:
+            self.changed.notify_all()
+
+    async def insert_one(self, doc):
+        doc = {"_id": ObjectId(), **doc}
+        self.docs[doc["_id"]] = doc
+        await self._log("insert", doc["_id"])
+        return doc["_id"]
+
+    async def update_one(self, doc_id, fields):
+        self.docs[doc_id].update(fields)
+        await self._log("update", doc_id)
+
+    async def delete_one(self, doc_id):
+        del self.docs[doc_id]
+        await self._log("delete", doc_id)
+
+    async def drop(self):
+        self.docs.clear()
+        await self._log("drop")
+        await self._log("invalidate")
+
+    async def bulk_write(self, requests, ordered=True):
+        # Only the UpdateOne({"_id": ...}, {"$set": ...}) form written by the index build
+        for request in requests:
+            doc_id = request._filter["_id"]
+            self.docs[doc_id].update(request._doc["$set"])
+            await self._log("update", doc_id)
+
+
+class MotorFaqCollection:
+    """Thin wrapper so the check can drive a real replica set with the same calls."""
+
+    def __init__(self, uri: str):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        self.database = AsyncIOMotorClient(uri)["faq_watcher_check"]
+        self.collection = self.database["faqs"]
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    async def insert_one(self, doc):
+        return (await self.collection.insert_one(doc)).inserted_id
+
+    async def update_one(self, doc_id, fields):
+        await self.collection.update_one({"_id": doc_id}, {"$set": fields})
+
+    async def delete_one(self, doc_id):
+        await self.collection.delete_one({"_id": doc_id})
+
+
+async def wait_for(condition, timeout=10.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "watcher did not apply the change in time"
+        await asyncio.sleep(0.05)
+
+
+async def top_question(query):
+    hits = await faq_search.search_faqs(query, k=1)
+    return hits[0].faq["question"] if hits else None
+
+
+async def main(uri):
+    collection = MotorFaqCollection(uri) if uri else InMemoryFaqCollection()
+    if uri:
+        await collection.delete_many({})
+
+    faq_search.faiss_path = tempfile.mkdtemp(prefix="faiss_store_")
+    await collection.insert_one({"question": "What is the breakfast time?", "answer": "7am to 10am."})
+    await collection.insert_one({"question": "Does the hotel have a gym?", "answer": "Yes, open 24 hours."})
+    await faq_search.load_faqs_from_mongodb(collection.database, force_rebuild=True)
+
+    watcher = asyncio.create_task(watch_faq_changes(collection, path=faq_search.faiss_path))
+    await asyncio.sleep(0.2)
+
+    pool_id = await collection.insert_one({"question": "Is there a swimming pool?", "answer": "Yes, on level 5."})
+    await wait_for(lambda: len(faq_search.faiss_index) == 3)
+    assert await top_question("swimming pool opening") == "Is there a swimming pool?"
+    print("insert applied")
+
+    await collection.update_one(pool_id, {"question": "Where is the rooftop pool?"})
+    await wait_for(lambda: faq_search.faiss_index.metadata[faq_search.faiss_index.ids_by_doc[str(pool_id)]]["question"] == "Where is the rooftop pool?")
+    print("update applied")
+
+    # Same question, new answer: updated in place, without re-adding the vector
+    pool_faiss_id = faq_search.faiss_index.ids_by_doc[str(pool_id)]
+    await collection.update_one(pool_id, {"answer": "Yes, on level 5, open 7am to 9pm."})
+    await wait_for(lambda: faq_search.faiss_index.metadata.get(pool_faiss_id, {}).get("answer") == "Yes, on level 5, open 7am to 9pm.")
+    assert faq_search.faiss_index.ids_by_doc[str(pool_id)] == pool_faiss_id, "answer edit re-added the vector"
+    print("answer edit applied in place")
+
+    watcher.cancel()
+    await asyncio.gather(watcher, return_exceptions=True)
+
+    # Edits made while the service is down
+    await collection.delete_one(pool_id)
+    await collection.insert_one({"question": "Are pets allowed?", "answer": "Sorry, no pets."})
+
+    faq_search.reload_faiss_index()
+    watcher = asyncio.create_task(watch_faq_changes(collection, path=faq_search.faiss_path))
+    await wait_for(lambda: str(pool_id) not in faq_search.faiss_index.ids_by_doc and len(faq_search.faiss_index) == 3)
+    assert await top_question("can I bring my dog") == "Are pets allowed?"
+    print("resumed from stored token: delete and insert applied")
+
+    await collection.drop()
+    await wait_for(lambda: len(faq_search.faiss_index) == 0)
+    emptied = faq_search.faiss_index
+    await asyncio.sleep(1.0)
+    assert faq_search.faiss_index is emptied, "watcher kept rebuilding after the drop"
+    assert await top_question("can I bring my dog") is None
+    await collection.insert_one({"question": "Is parking free?", "answer": "Yes, for hotel guests."})
+    await wait_for(lambda: len(faq_search.faiss_index) == 1)
+    print("drop applied: index emptied once, later inserts picked up")
+
+    watcher.cancel()
+    await asyncio.gather(watcher, return_exceptions=True)
+    print("OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--uri", help="MongoDB replica-set URI; defaults to the in-memory stand-in")
+    asyncio.run(main(parser.parse_args().uri))
@@ -0,0 +1,115 @@
+"""
+Recall@k vs. per-query latency of the FAQ index types (flat, HNSW, IVF-PQ,
+each with and without PCA; IVF-PQ also by refine k_factor and without the
+refine stage) over a synthetic multi-property FAQ corpus.
+
+The corpus starts from the texts in data/faq.json, embedded with the shared
+engine, and is expanded to --size vectors by giving every "hotel" its own
+noisy copy of each question (Gaussian noise, then re-normalized). Queries are
+further-perturbed corpus vectors; ground truth is the exact flat search.
+--random-base swaps the embedded texts for random unit vectors, so the
+benchmark also runs without the embedding model.
+
+Run from the model-service directory:
+    python -m benchmarks.faq_index_recall
+    python -m benchmarks.faq_index_recall --size 50000 --k 5
+"""
+import argparse
+import json
+import statistics
+import time
+
+import faiss
+import numpy as np
+
+from retrieval.faq_index import FaqIndex, IndexConfig
+
+DIMENSION = 384  # all-MiniLM-L6-v2, used with --random-base
+
+
+def base_vectors(random_base: bool, rng) -> np.ndarray:
+    if random_base:
+        vectors = rng.standard_normal((64, DIMENSION)).astype(np.float32)
+    else:
+        from retrieval.embedding import embedding_engine
+        with open("data/faq.json", encoding="utf-8") as f:
+            texts = [row["text"] for row in json.load(f)]
+        vectors = embedding_engine.encode_batch(texts)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def perturb(vectors: np.ndarray, noise: float, rng) -> np.ndarray:
+    noisy = (vectors + noise * rng.standard_normal(vectors.shape) / np.sqrt(vectors.shape[1])).astype(np.float32)
+    faiss.normalize_L2(noisy)
+    return noisy
+
+
+def synthetic_corpus(base: np.ndarray, size: int, queries: int, rng):
+    picks = rng.integers(0, len(base), size=size)
+    corpus = perturb(base[picks], noise=0.6, rng=rng)
+    query_vectors = perturb(corpus[rng.integers(0, size, size=queries)], noise=0.3, rng=rng)
+    return corpus, query_vectors
+
+
+def configurations(dimension: int):
+    pq_m = 16 if dimension % 16 == 0 else 8
+    yield "flat", IndexConfig(index_type="flat")
+    for m in (16, 32):
+        for ef in (16, 64, 128):
+            yield f"hnsw M={m} ef={ef}", IndexConfig(index_type="hnsw", hnsw_m=m, ef_search=ef)
+    yield "hnsw M=32 ef=64 pca=128", IndexConfig(index_type="hnsw", hnsw_m=32, ef_search=64, pca_dim=128)
+    for nprobe in (4, 16, 64):
+        yield f"ivfpq m={pq_m} nprobe={nprobe}", IndexConfig(index_type="ivfpq", pq_m=pq_m, nprobe=nprobe)
+    for k_factor in (4, 16):
+        yield f"ivfpq m={pq_m} nprobe=16 kf={k_factor}", IndexConfig(index_type="ivfpq", pq_m=pq_m, nprobe=16, refine_k_factor=k_factor)
+    yield f"ivfpq m={pq_m} nprobe=16 no refine", IndexConfig(index_type="ivfpq", pq_m=pq_m, nprobe=16, ivf_refine=False)
+    yield f"ivfpq m={2 * pq_m} nprobe=16", IndexConfig(index_type="ivfpq", pq_m=2 * pq_m, nprobe=16)
+    yield f"ivfpq m={pq_m} nprobe=16 pca=128", IndexConfig(index_type="ivfpq", pq_m=pq_m, nprobe=16, pca_dim=128)
+
+
+def measure(name, config, corpus, queries, truth, k):
+    faqs = [{"id": str(i), "question": str(i), "answer": ""} for i in range(len(corpus))]
+    start = time.perf_counter()
+    faq_index = FaqIndex.build(faqs, corpus, config)
+    build_seconds = time.perf_counter() - start
+    size_mb = faiss.serialize_index(faq_index.index).nbytes / 1e6
+
+    latencies, found = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        hits = faq_index.search(query, k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found += len({int(hit.faq["id"]) for hit in hits} & set(expected.tolist()))
+
+    latencies.sort()
+    print(
+        f"{name:<28} {faq_index.config.index_type:>6} recall@{k} {found / truth.size:6.3f}  "
+        f"mean {statistics.mean(latencies):7.3f} ms  p95 {latencies[int(0.95 * len(latencies))]:7.3f} ms  "
+        f"build {build_seconds:6.1f} s  size {size_mb:7.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=20000, help="synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--random-base", action="store_true", help="random unit vectors instead of embedded data/faq.json texts")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    corpus, queries = synthetic_corpus(base_vectors(args.random_base, rng), args.size, args.queries, rng)
+
+    exact = faiss.IndexFlatIP(corpus.shape[1])
+    exact.add(corpus)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"{args.size} vectors x {corpus.shape[1]} dims, {args.queries} queries, one query per search call")
+    for name, config in configurations(corpus.shape[1]):
+        measure(name, config, corpus, queries, truth, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+FAQ search over the whole corpus vs. routed to the query intent's partition
+(retrieval.faq_search.route_search), on a large synthetic corpus.
+
+Each intent gets a random topic direction, and its FAQs are noisy vectors
+around it, so same-intent questions sit closer together than the rest.
+Queries are perturbed FAQ vectors whose intent comes from a simulated
+classifier with --intent-accuracy (confident when right, less so when wrong).
+Precision@1 is the share of queries whose top hit is the FAQ they came from.
+The benchmark also reports mean latency and how often the routed search stayed
+in the partition.
+
+Run from the model-service directory:
+    python -m benchmarks.faq_partition_search
+    python -m benchmarks.faq_partition_search --size 200000 --intents 20 --index-type hnsw
+"""
+import argparse
+import statistics
+import time
+
+import faiss
+import numpy as np
+
+from retrieval.faq_index import FaqIndex, IndexConfig
+from retrieval.faq_search import route_search
+from utils import metrics
+
+DIMENSION = 384  # all-MiniLM-L6-v2
+
+
+def unit(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def synthetic_corpus(size: int, intents: int, rng):
+    topics = unit(rng.standard_normal((intents, DIMENSION)))
+    labels = rng.integers(0, intents, size=size)
+    corpus = unit(topics[labels] + 1.2 * rng.standard_normal((size, DIMENSION)) / np.sqrt(DIMENSION))
+    faqs = [{"id": str(i), "question": str(i), "answer": "", "intent": f"intent{label}"} for i, label in enumerate(labels.tolist())]
+    return faqs, corpus, labels
+
+
+def simulated_intents(labels, intents: int, accuracy: float, rng):
+    predicted = []
+    for label in labels.tolist():
+        if rng.random() < accuracy:
+            predicted.append((f"intent{label}", float(rng.uniform(0.6, 1.0))))
+        else:
+            predicted.append((f"intent{int(rng.integers(0, intents))}", float(rng.uniform(0.3, 0.9))))
+    return predicted
+
+
+def measure(search, queries, sources):
+    latencies, correct = [], 0
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        hits = search(i, query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        correct += bool(hits) and hits[0].faq["id"] == str(sources[i])
+    return statistics.mean(latencies), correct / len(queries)
+
+
+def main(size: int, intents: int, queries: int, accuracy: float, index_type: str):
+    rng = np.random.default_rng(0)
+    faqs, corpus, labels = synthetic_corpus(size, intents, rng)
+    sources = rng.integers(0, size, size=queries)
+    query_vectors = unit(corpus[sources] + 0.5 * rng.standard_normal((queries, DIMENSION)) / np.sqrt(DIMENSION))
+    predicted = simulated_intents(labels[sources], intents, accuracy, rng)
+
+    start = time.perf_counter()
+    faq_index = FaqIndex.build(faqs, corpus, IndexConfig(index_type=index_type, intent_partitions=True))
+    print(f"{size} FAQs, {intents} intents, {index_type} index, built in {time.perf_counter() - start:.1f} s; "
+          f"simulated intent accuracy {accuracy:.0%}")
+
+    results = {
+        "global index": measure(lambda i, q: faq_index.search(q, k=1), query_vectors, sources),
+        "intent partition": measure(lambda i, q: route_search(faq_index, q, 1, *predicted[i]), query_vectors, sources),
+    }
+    print(f"{'search':<18} {'mean latency':>13} {'precision@1':>12}")
+    for name, (latency, precision) in results.items():
+        print(f"{name:<18} {latency:>10.3f} ms {precision:>12.3f}")
+
+    counters = metrics.snapshot()["counters"]
+    print(f"routed: {counters.get('faq_partition.hit', 0):.0f} answered by the partition, "
+          f"{counters.get('faq_partition.fallback', 0):.0f} weak-score fallbacks, "
+          f"{counters.get('faq_partition.miss', 0) - counters.get('faq_partition.fallback', 0):.0f} low-confidence global searches")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--intents", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--intent-accuracy", type=float, default=0.9)
+    parser.add_argument("--index-type", default="flat", choices=["flat", "hnsw", "ivfpq"])
+    args = parser.parse_args()
+    main(args.size, args.intents, args.queries, args.intent_accuracy, args.index_type)
@@ -0,0 +1,76 @@
+"""
+Per-query FAQ lookup latency: LangChain FAISS + cosine re-embedding vs. the
+normalized inner-product FaqIndex.
+
+The old path encoded the query for the FAISS search and then encoded the
+query and the matched question again to compute the cosine score (three
+forward passes). The new path encodes the query once and reads the cosine
+score straight from the search result.
+
+Run from the model-service directory:
+    python -m benchmarks.faq_query_latency
+"""
+import json
+import statistics
+import time
+
+import numpy as np
+from langchain.schema import Document
+from langchain_community.vectorstores import FAISS
+
+from benchmarks.langchain_adapter import SharedEmbeddings
+from retrieval.embedding import embedding_engine
+from retrieval.faq_index import FaqIndex
+
+ROUNDS = 5
+
+
+def load_corpus():
+    with open("data/faq.json", encoding="utf-8") as f:
+        rows = json.load(f)
+    faqs = [{"id": str(i), "question": r["text"], "answer": r["intent"]} for i, r in enumerate(rows)]
+    # Queries are light rewrites of the stored questions, as guests would type them
+    queries = [r["text"].lower().rstrip("?.!") for r in rows]
+    return faqs, queries
+
+
+def legacy_lookup(store, query):
+    result, _ = store.similarity_search_with_score(query, k=1)[0]
+    query_vector, docs_vector = embedding_engine.encode_batch([query, result.metadata["question"]])
+    return float(np.dot(query_vector, docs_vector)), result.metadata
+
+
+def new_lookup(faq_index, query):
+    hit = faq_index.search(embedding_engine.encode(query), k=1)[0]
+    return hit.score, hit.faq
+
+
+def measure(lookup, target, queries):
+    timings = []
+    for _ in range(ROUNDS):
+        for query in queries:
+            start = time.perf_counter()
+            lookup(target, query)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    faqs, queries = load_corpus()
+    documents = [Document(page_content=f"Q:{f['question']} \nA:{f['answer']}", metadata=f) for f in faqs]
+    store = FAISS.from_documents(documents, SharedEmbeddings(embedding_engine))
+    faq_index = FaqIndex.build(faqs, embedding_engine.encode_batch([f["question"] for f in faqs]))
+
+    embedding_engine.encode("warm up")
+    agree = sum(legacy_lookup(store, q)[1]["id"] == new_lookup(faq_index, q)[1]["id"] for q in queries)
+
+    print(f"{'path':<8} {'mean (ms)':>10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    for name, lookup, target in (("legacy", legacy_lookup, store), ("new", new_lookup, faq_index)):
+        timings = sorted(measure(lookup, target, queries))
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{name:<8} {statistics.mean(timings):>10.2f} {statistics.median(timings):>10.2f} {p95:>10.2f}")
+    print(f"top-1 agreement: {agree}/{len(queries)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Intent classifier backends: PyTorch (intent_classifier.pth) vs. NumPy/SciPy
+(intent_classifier.npz, written by
+models/train_model/train_model_intent_classifier.py --export-only).
+
+Each backend is loaded in a fresh interpreter, which reports the time to
+import models.intentModel and classify one text, its peak resident memory and
+whether torch ended up imported. The argmax of both backends is then compared
+over the texts in data/faq.json (plus lower-cased, unpunctuated variants).
+
+Run from the model-service directory:
+    python -m benchmarks.intent_backend_startup
+"""
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+BACKENDS = ("torch", "numpy")
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+from models.intentModel import predict_intent
+predict_intent("What time is breakfast served?")
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "torch_imported": "torch" in sys.modules,
+}))
+"""
+
+
+def probe(backend):
+    env = dict(os.environ, INTENT_BACKEND=backend)
+    result = subprocess.run([sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare_predictions():
+    from models import intentModel
+    with open("data/faq.json", encoding="utf-8") as f:
+        texts = [row["text"] for row in json.load(f)]
+    texts += [text.lower().rstrip("?.!") for text in texts]
+
+    counts = intentModel.vectorizer.transform(texts)
+    logits = {backend: intentModel.load_intent_backend(backend).logits(counts) for backend in BACKENDS}
+    mismatches = int((logits["torch"].argmax(axis=1) != logits["numpy"].argmax(axis=1)).sum())
+    max_diff = float(np.abs(logits["torch"] - logits["numpy"]).max())
+    print(f"{len(texts)} texts: {mismatches} argmax mismatches, max logit difference {max_diff:.2e}")
+
+
+def main():
+    print(f"{'backend':<8} {'load + first prediction':>24} {'peak RSS':>10} {'torch imported':>15}")
+    for backend in BACKENDS:
+        stats = probe(backend)
+        print(f"{backend:<8} {stats['seconds']:>22.2f} s {stats['max_rss_mb']:>7.0f} MB {str(stats['torch_imported']):>15}")
+    compare_predictions()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Batched sparse intent classification (predict_intents) vs. the per-text
+dense path it replaces.
+
+First checks that predict_intents returns the same labels as the dense
+forward pass over the texts in data/faq.json (plus lower-cased, unpunctuated
+variants). Then measures texts per second for both paths on randomly
+initialised classifiers with growing vocabularies, where the dense path has
+to materialise a full vocabulary-wide row for every text.
+
+Run from the model-service directory:
+    python -m benchmarks.intent_batch_throughput
+    python -m benchmarks.intent_batch_throughput --batch 256 --vocab 1000 20000 200000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import scipy.sparse as sp
+import torch
+
+from models.intent_torch import IntentClassifier, TorchIntentBackend, sparse_logits
+from models.intentModel import INTENT_WEIGHTS_PATH, label_encoder, predict_intents, vectorizer
+
+TOKENS_PER_TEXT = 8
+OUTPUT_DIM = 8
+
+
+def dense_predict(net, counts):
+    """The previous predict_intent: densify one row and run the full network."""
+    text_tensor = torch.tensor(np.asarray(counts.todense()), dtype=torch.float32).to(net[0].weight.device)
+    with torch.inference_mode():
+        return net(text_tensor)
+
+
+def check_predictions():
+    with open("data/faq.json", encoding="utf-8") as f:
+        texts = [row["text"] for row in json.load(f)]
+    texts += [text.lower().rstrip("?.!") for text in texts]
+
+    model = TorchIntentBackend(INTENT_WEIGHTS_PATH, len(vectorizer.get_feature_names_out()), len(label_encoder.classes_)).model
+    predictions = predict_intents(texts)
+    mismatches = 0
+    max_confidence_diff = 0.0
+    for text, (intent, confidence) in zip(texts, predictions):
+        probabilities = torch.softmax(dense_predict(model.net, vectorizer.transform([text])), dim=1)[0]
+        index = int(probabilities.argmax())
+        mismatches += label_encoder.inverse_transform([index])[0] != intent
+        max_confidence_diff = max(max_confidence_diff, abs(float(probabilities[index]) - confidence))
+    print(f"{len(texts)} texts: {mismatches} label mismatches, max confidence difference {max_confidence_diff:.2e}")
+
+
+def random_counts(rows, vocab, rng):
+    cols = rng.integers(0, vocab, size=(rows, TOKENS_PER_TEXT))
+    data = np.ones(cols.size, dtype=np.int64)
+    indptr = np.arange(0, cols.size + 1, TOKENS_PER_TEXT)
+    counts = sp.csr_matrix((data, cols.ravel(), indptr), shape=(rows, vocab))
+    counts.sum_duplicates()
+    return counts
+
+
+def throughput(batch, vocab_sizes):
+    rng = np.random.default_rng(0)
+    print(f"{'vocab':>8} {'dense per text':>16} {'sparse batch':>14} {'speed-up':>9}   (texts/s, batch {batch})")
+    for vocab in vocab_sizes:
+        net = IntentClassifier(vocab, OUTPUT_DIM).eval().net
+        counts = random_counts(batch, vocab, rng)
+
+        start = time.perf_counter()
+        for i in range(batch):
+            dense_predict(net, counts[i])
+        dense_rate = batch / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        with torch.inference_mode():
+            sparse_logits(net, counts).argmax(dim=1)
+        sparse_rate = batch / (time.perf_counter() - start)
+        print(f"{vocab:>8} {dense_rate:>16,.0f} {sparse_rate:>14,.0f} {sparse_rate / dense_rate:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, default=128)
+    parser.add_argument("--vocab", type=int, nargs="+", default=[1_000, 10_000, 50_000, 200_000])
+    args = parser.parse_args()
+    check_predictions()
+    throughput(args.batch, args.vocab)
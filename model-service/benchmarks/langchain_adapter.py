@@ -0,0 +1,21 @@
+"""
+LangChain adapter over the shared embedding engine, for the benchmarks that
+compare against LangChain vector stores. The service itself does not use
+LangChain, so the langchain_core import stays out of retrieval/.
+"""
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+
+class SharedEmbeddings(Embeddings):
+    """LangChain adapter so vector stores reuse the shared engine instead of loading their own copy."""
+
+    def __init__(self, engine):
+        self.engine = engine  # retrieval.embedding.EmbeddingEngine
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.engine.encode_batch(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.engine.encode(text).tolist()
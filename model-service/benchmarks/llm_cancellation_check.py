@@ -0,0 +1,126 @@
+"""
+Check that abandoning an answer aborts the upstream Ollama generation.
+
+A stub Ollama server streams a long answer slowly and records, per request,
+how many tokens it wrote before the client went away. Turns run through the
+real ConversationDispatcher and stream_llm:
+  * disconnect: the dispatcher is closed mid-answer (socket gone),
+  * pre-emption: a newer message on the same conversation arrives mid-answer.
+In both cases the stub must see the connection drop right away instead of
+streaming the whole answer, and the llm.cancelled / llm.tokens_saved
+counters must move.
+
+Run from the model-service directory:
+    python -m benchmarks.llm_cancellation_check
+"""
+import asyncio
+import json
+
+from aiohttp import web
+
+from models import llm
+from utils import metrics
+from utils.conversation_dispatcher import ConversationDispatcher
+
+ANSWER_TOKENS = 400
+TOKEN_INTERVAL = 0.01   # seconds
+
+
+class StubOllama:
+    def __init__(self):
+        self.written = []   # tokens written per request, filled in when the request ends
+        self.aborted = []
+
+    async def generate(self, request):
+        body = await request.json()
+        resp = web.StreamResponse()
+        await resp.prepare(request)
+        written = 0
+        try:
+            for i in range(ANSWER_TOKENS):
+                await resp.write(json.dumps({"response": f"{body['prompt']}:{i} ", "done": False}).encode() + b"\n")
+                written += 1
+                await asyncio.sleep(TOKEN_INTERVAL)
+            await resp.write(json.dumps({"response": "", "done": True, "eval_count": ANSWER_TOKENS}).encode() + b"\n")
+            self.aborted.append(False)
+        except ConnectionResetError:
+            self.aborted.append(True)
+        except asyncio.CancelledError:
+            # aiohttp may also cancel the handler when the client drops the connection
+            self.aborted.append(True)
+            raise
+        finally:
+            self.written.append(written)
+        return resp
+
+
+async def chatbot(payload):
+    """Shape of handle_chatbot: stream the LLM answer, then the final marker."""
+    async for token in llm.stream_llm(prompt=payload["question"]):
+        yield token, False
+    yield "", True
+
+
+async def wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+async def main():
+    stub = StubOllama()
+    app = web.Application()
+    app.router.add_post("/api/generate", stub.generate)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    llm.LLM_URL = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/api/generate"
+
+    frames = []
+
+    async def send(frame):
+        frames.append(frame)
+
+    try:
+        # A full answer first, so tokens_saved has a typical answer length to estimate from
+        dispatcher = ConversationDispatcher(chatbot, send, coalesce_ms=0)
+        dispatcher.submit({"conversationId": "warmup", "question": "warmup"})
+        await wait_for(lambda: any(f.get("isFinal") for f in frames), timeout=ANSWER_TOKENS * TOKEN_INTERVAL * 3)
+        await dispatcher.close()
+
+        # Disconnect mid-answer
+        dispatcher = ConversationDispatcher(chatbot, send, coalesce_ms=0)
+        dispatcher.submit({"conversationId": "c1", "question": "a"})
+        await wait_for(lambda: any(f["token"].startswith("a:20") for f in frames))
+        await dispatcher.close()
+        await wait_for(lambda: len(stub.written) == 2)
+        assert stub.aborted[1], "stub streamed the whole answer after the disconnect"
+        print(f"disconnect : upstream stopped after {stub.written[1]}/{ANSWER_TOKENS} tokens")
+
+        # Pre-emption by a newer message on the same conversation
+        frames.clear()
+        dispatcher = ConversationDispatcher(chatbot, send, coalesce_ms=0, preempt=True)
+        dispatcher.submit({"conversationId": "c2", "question": "old"})
+        await wait_for(lambda: any(f["token"].startswith("old:20") for f in frames))
+        dispatcher.submit({"conversationId": "c2", "question": "new"})
+        await wait_for(lambda: len(stub.written) == 3)
+        assert stub.aborted[2], "older answer kept streaming after pre-emption"
+        await wait_for(lambda: any(f["token"].startswith("new:") for f in frames))
+        await dispatcher.close()
+        closed_old = any(f["isFinal"] and f["token"] == "" for f in frames[:frames.index(next(f for f in frames if f["token"].startswith("new:")))])
+        assert closed_old, "pre-empted answer was not closed with an isFinal frame"
+        print(f"pre-emption: upstream stopped after {stub.written[2]}/{ANSWER_TOKENS} tokens, newer answer streamed")
+
+        counters = metrics.snapshot()["counters"]
+        print(f"llm.cancelled {counters.get('llm.cancelled', 0):.0f}, llm.tokens_saved {counters.get('llm.tokens_saved', 0):.0f}")
+        assert counters.get("llm.tokens_saved", 0) > 0
+        print("OK")
+    finally:
+        await llm.close_llm_session()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""
+Burst behaviour of the LLM admission scheduler vs. calling stream_llm directly.
+
+A stub Ollama server models one shared GPU: each request's per-token time
+grows with the number of generations running at once, so unthrottled
+parallel requests all get slow together. A burst of turns (booking, FAQ and
+fallback mixed, arriving together) is sent once straight to stream_llm and
+once through LLMScheduler. Per class the benchmark reports time to first
+token, time to the full answer and how many turns got the busy response.
+
+Run from the model-service directory:
+    python -m benchmarks.llm_scheduler_burst
+    python -m benchmarks.llm_scheduler_burst --turns 60 --in-flight 2 --deadline 3
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from aiohttp import web
+
+from models import llm
+from models.llm_scheduler import LLMScheduler, LLM_BUSY_MESSAGE, PRIORITY_BOOKING, PRIORITY_FAQ, PRIORITY_FALLBACK, PRIORITY_NAMES
+
+ANSWER_TOKENS = 40
+BASE_TOKEN_TIME = 0.004   # seconds per token with a single active generation
+
+
+class SharedGpuStub:
+    def __init__(self):
+        self.active = 0
+
+    async def generate(self, request):
+        await request.json()
+        resp = web.StreamResponse()
+        await resp.prepare(request)
+        self.active += 1
+        try:
+            for i in range(ANSWER_TOKENS):
+                await asyncio.sleep(BASE_TOKEN_TIME * self.active)
+                await resp.write(json.dumps({"response": f" t{i}", "done": False}).encode() + b"\n")
+            await resp.write(json.dumps({"response": "", "done": True, "eval_count": ANSWER_TOKENS}).encode() + b"\n")
+        except ConnectionResetError:
+            pass
+        finally:
+            self.active -= 1
+        return resp
+
+
+async def turn(stream, priority):
+    start = time.perf_counter()
+    first = None
+    busy = False
+    async for token in stream(priority):
+        if first is None:
+            first = time.perf_counter() - start
+        busy = token == LLM_BUSY_MESSAGE
+    return priority, first, time.perf_counter() - start, busy
+
+
+async def burst(stream, priorities):
+    return await asyncio.gather(*(turn(stream, priority) for priority in priorities))
+
+
+def report(name, results):
+    print(name)
+    for priority, label in PRIORITY_NAMES.items():
+        rows = [r for r in results if r[0] == priority]
+        served = [r for r in rows if not r[3]]
+        if served:
+            print(f"  {label:<9} TTFT mean {statistics.mean(r[1] for r in served):6.2f} s  "
+                  f"answer mean {statistics.mean(r[2] for r in served):6.2f} s  max {max(r[2] for r in served):6.2f} s  "
+                  f"busy {len(rows) - len(served)}/{len(rows)}")
+        else:
+            print(f"  {label:<9} busy {len(rows)}/{len(rows)}")
+
+
+async def main(turns: int, in_flight: int, deadline: float):
+    stub = SharedGpuStub()
+    app = web.Application()
+    app.router.add_post("/api/generate", stub.generate)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    llm.LLM_URL = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/api/generate"
+
+    rng = random.Random(0)
+    priorities = [(PRIORITY_BOOKING, PRIORITY_FAQ, PRIORITY_FALLBACK)[i % 3] for i in range(turns)]
+    rng.shuffle(priorities)
+    scheduler = LLMScheduler(max_in_flight=in_flight, queue_deadline=deadline)
+    print(f"{turns} turns at once, {ANSWER_TOKENS}-token answers, {BASE_TOKEN_TIME * ANSWER_TOKENS:.2f} s each when alone")
+    try:
+        report("direct stream_llm", await burst(lambda priority: llm.stream_llm("q"), priorities))
+        report(f"LLMScheduler (in-flight {in_flight}, deadline {deadline:g} s)",
+               await burst(lambda priority: scheduler.stream("q", priority), priorities))
+    finally:
+        await llm.close_llm_session()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--in-flight", type=int, default=2)
+    parser.add_argument("--deadline", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.in_flight, args.deadline))
@@ -0,0 +1,108 @@
+"""
+Time-to-first-token of stream_llm: a new aiohttp session per generation
+(the old behaviour) vs. the pooled keep-alive session.
+
+A stub Ollama server on localhost answers /api/generate with NDJSON lines
+like the real one: the first token right away, the rest every few ms. TTFT
+is measured from the call to the first yielded token, so it covers session
+and connector setup, DNS, the TCP handshake and the request itself.
+
+Run from the model-service directory:
+    python -m benchmarks.llm_ttft
+    python -m benchmarks.llm_ttft --requests 500 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import aiohttp
+from aiohttp import web
+
+from models import llm
+
+TOKENS = ["Hello", " there", ",", " breakfast", " is", " served", " from", " 7", " to", " 10", " am", "."]
+TOKEN_INTERVAL = 0.002  # seconds between streamed tokens
+
+
+async def generate(request):
+    await request.json()
+    resp = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await resp.prepare(request)
+    for i, token in enumerate(TOKENS):
+        if i:
+            await asyncio.sleep(TOKEN_INTERVAL)
+        await resp.write(json.dumps({"model": "stub", "response": token, "done": False}).encode() + b"\n")
+    await resp.write(json.dumps({"model": "stub", "response": "", "done": True}).encode() + b"\n")
+    await resp.write_eof()
+    return resp
+
+
+async def start_stub():
+    app = web.Application()
+    app.router.add_post("/api/generate", generate)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "localhost", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://localhost:{port}/api/generate"
+
+
+async def legacy_stream_llm(prompt: str):
+    """The previous stream_llm: a fresh ClientSession (connector, DNS, handshake) per generation."""
+    payload = {"model": llm.LLM_MODEL, "prompt": prompt, "stream": True, "temperature": 0.2}
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=llm.TIMEOUT)) as session:
+        async with session.post(llm.LLM_URL, json=payload) as resp:
+            buffer = b""
+            async for chunk in resp.content.iter_chunked(1024):
+                buffer += chunk
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    if line.strip():
+                        token = json.loads(line).get("response")
+                        if token:
+                            yield token
+
+
+async def ttft(stream_fn) -> float:
+    start = time.perf_counter()
+    first = None
+    async for _ in stream_fn("What time is breakfast?"):
+        if first is None:
+            first = (time.perf_counter() - start) * 1000
+    return first
+
+
+async def run(stream_fn, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            return await ttft(stream_fn)
+
+    samples = sorted(await asyncio.gather(*(one() for _ in range(requests))))
+    return statistics.mean(samples), samples[len(samples) // 2], samples[int(0.95 * len(samples))]
+
+
+async def main(requests: int, concurrency: int):
+    runner, url = await start_stub()
+    llm.LLM_URL = url
+    try:
+        for level in sorted({1, concurrency}):
+            for name, stream_fn in (("new session per call", legacy_stream_llm), ("pooled keep-alive", llm.stream_llm)):
+                await run(stream_fn, 10, level)  # warm-up
+                mean, p50, p95 = await run(stream_fn, requests, level)
+                print(f"concurrency {level:>3}  {name:<22} TTFT mean {mean:6.2f} ms  p50 {p50:6.2f} ms  p95 {p95:6.2f} ms")
+    finally:
+        await llm.close_llm_session()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
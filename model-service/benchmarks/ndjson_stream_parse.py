@@ -0,0 +1,114 @@
+"""
+Replay an Ollama /api/generate stream through the old line splitter
+(bytes += chunk, split(b"\\n", 1), json.loads) and through NDJSONStream
+(bytearray + memoryview + orjson), checking that both yield the same tokens.
+
+The default recording is synthetic but shaped like Ollama's output: one
+{"model", "created_at", "response", "done"} line per token and a final
+"done" line carrying the context array. A real capture can be replayed with
+    curl -sN localhost:11434/api/generate -d '{"model":"mistral","prompt":"..."}' > stream.ndjson
+    python -m benchmarks.ndjson_stream_parse --record stream.ndjson
+
+Run from the model-service directory:
+    python -m benchmarks.ndjson_stream_parse
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from utils.ndjson_stream import NDJSONStream
+
+ROUNDS = 20
+WORDS = ["the", " breakfast", " is", " served", " from", " 7", " am", " in", " the", " lobby", " restaurant", ",", "."]
+
+
+def synthetic_recording(tokens: int) -> bytes:
+    lines = [
+        json.dumps({"model": "mistral", "created_at": f"2025-01-01T00:00:{i % 60:02d}.{i:06d}Z", "response": WORDS[i % len(WORDS)], "done": False})
+        for i in range(tokens)
+    ]
+    lines.append(json.dumps({"model": "mistral", "created_at": "2025-01-01T00:01:00Z", "response": "", "done": True,
+                             "context": list(range(tokens * 2)), "total_duration": 123456789, "eval_count": tokens}))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def chunked(data: bytes, sizes):
+    chunks, position = [], 0
+    while position < len(data):
+        size = next(sizes)
+        chunks.append(data[position:position + size])
+        position += size
+    return chunks
+
+
+def legacy_tokens(chunks):
+    tokens = []
+    buffer = b""
+    for chunk in chunks:
+        buffer += chunk
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line.decode("utf-8"))
+            except json.JSONDecodeError:
+                continue
+            token = data.get("response")
+            if token:
+                tokens.append(token)
+    return tokens
+
+
+def ndjson_tokens(chunks):
+    tokens = []
+    lines = NDJSONStream()
+    for chunk in chunks:
+        for data in lines.feed(chunk):
+            token = data.get("response")
+            if token:
+                tokens.append(token)
+    return tokens
+
+
+def timed(parse, chunks):
+    samples = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        tokens = parse(chunks)
+        samples.append((time.perf_counter() - start) * 1000)
+    return tokens, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", help="file with a captured Ollama NDJSON stream")
+    parser.add_argument("--tokens", type=int, default=5000, help="tokens in the synthetic recording")
+    args = parser.parse_args()
+
+    if args.record:
+        with open(args.record, "rb") as f:
+            data = f.read()
+    else:
+        data = synthetic_recording(args.tokens)
+
+    rng = random.Random(0)
+    layouts = {
+        "1024-byte chunks": chunked(data, iter(lambda: 1024, None)),
+        "16 KiB chunks": chunked(data, iter(lambda: 16384, None)),
+        "one line per chunk": [line + b"\n" for line in data.split(b"\n") if line],
+        "random 1-4096 bytes": chunked(data, iter(lambda: rng.randint(1, 4096), None)),
+    }
+
+    print(f"{len(data) / 1024:.0f} KiB recording, median of {ROUNDS} replays")
+    for name, chunks in layouts.items():
+        expected, legacy_ms = timed(legacy_tokens, chunks)
+        tokens, ndjson_ms = timed(ndjson_tokens, chunks)
+        assert tokens == expected, f"token mismatch with {name}"
+        print(f"{name:<20} {len(tokens)} tokens  legacy {legacy_ms:8.2f} ms  NDJSONStream {ndjson_ms:8.2f} ms  x{legacy_ms / ndjson_ms:.1f}")
+
+
+if __name__ == "__main__":
+    main()
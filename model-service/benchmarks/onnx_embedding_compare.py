@@ -0,0 +1,107 @@
+"""
+PyTorch (sentence-transformers) vs. int8 ONNX Runtime embedding backend.
+
+Accuracy: every question in data/faq.json is rewritten the way a guest would
+type it and ranked against the full question list with both backends. The
+ONNX backend passes when it picks the same top-1 question for every query
+and no cosine score differs by more than COSINE_TOLERANCE.
+
+Speed and memory: each backend is loaded in a fresh interpreter and timed on
+single-query and batch encodes.
+
+Export the model first, then run from the model-service directory:
+    python models/train_model/export_embedding_onnx.py
+    python -m benchmarks.onnx_embedding_compare
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+COSINE_TOLERANCE = 0.02
+BACKENDS = ("torch", "onnx")
+ROUNDS = 20
+
+
+def load_texts():
+    with open("data/faq.json", encoding="utf-8") as f:
+        corpus = [row["text"] for row in json.load(f)]
+    queries = [text.lower().rstrip("?.!") for text in corpus]
+    return corpus, queries
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def child(backend: str):
+    from retrieval.embedding import EmbeddingEngine
+
+    corpus, queries = load_texts()
+    baseline_rss = current_rss_mb()
+    start = time.perf_counter()
+    engine = EmbeddingEngine(backend=backend)
+    engine.encode("warm up")
+    load_s = time.perf_counter() - start
+
+    single = []
+    for _ in range(ROUNDS):
+        for query in queries:
+            t = time.perf_counter()
+            engine.encode(query)
+            single.append((time.perf_counter() - t) * 1000)
+
+    batch = []
+    for _ in range(ROUNDS):
+        t = time.perf_counter()
+        engine.encode_batch(corpus)
+        batch.append((time.perf_counter() - t) * 1000)
+
+    scores = engine.encode_batch(queries) @ engine.encode_batch(corpus).T
+    print(json.dumps({
+        "backend": backend,
+        "load_s": round(load_s, 3),
+        "single_ms": round(statistics.median(single), 2),
+        "batch_ms": round(statistics.median(batch), 2),
+        "rss_delta_mb": round(current_rss_mb() - baseline_rss, 1),
+        "scores": scores.tolist(),
+    }))
+
+
+def main():
+    results = {}
+    for backend in BACKENDS:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.onnx_embedding_compare", "--child", backend],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        results[backend] = result
+
+    corpus, _ = load_texts()
+    reference = np.array(results["torch"]["scores"])
+    candidate = np.array(results["onnx"]["scores"])
+    top1_agree = int((reference.argmax(axis=1) == candidate.argmax(axis=1)).sum())
+    max_diff = float(np.abs(reference - candidate).max())
+
+    print(f"{'backend':<8} {'load (s)':>9} {'1 query (ms)':>13} {f'{len(corpus)} texts (ms)':>15} {'rss (MB)':>9}")
+    for backend in BACKENDS:
+        r = results[backend]
+        print(f"{backend:<8} {r['load_s']:>9} {r['single_ms']:>13} {r['batch_ms']:>15} {r['rss_delta_mb']:>9}")
+    print(f"top-1 agreement: {top1_agree}/{len(reference)}")
+    print(f"max |cosine diff|: {max_diff:.4f} (tolerance {COSINE_TOLERANCE})")
+    if top1_agree != len(reference) or max_diff > COSINE_TOLERANCE:
+        sys.exit("ONNX backend ranking is outside the stated tolerance")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        child(sys.argv[2])
+    else:
+        main()
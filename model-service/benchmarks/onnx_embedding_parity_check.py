@@ -0,0 +1,99 @@
+"""
+Parity check of the int8 ONNX Runtime embedding backend against the PyTorch
+all-MiniLM-L6-v2 it was exported from.
+
+Both backends encode every question in data/faq.json plus the lower-cased,
+unpunctuated variants guests type. The check fails when:
+- a text's ONNX vector has cosine below 1 - VECTOR_TOLERANCE with its torch vector
+- any query/question score differs by more than COSINE_TOLERANCE
+- a query's top-1 question differs, or its ONNX top-TOP_K contains a question
+  the torch ranking scores more than COSINE_TOLERANCE below its own k-th hit
+
+It exits with SKIPPED (status 0) when the ONNX export or the PyTorch weights
+are not available, and with a non-zero status on any failure.
+
+Export the model first, then run from the model-service directory:
+    python models/train_model/export_embedding_onnx.py
+    python -m benchmarks.onnx_embedding_parity_check
+"""
+import os
+import sys
+
+import numpy as np
+
+from benchmarks.onnx_embedding_compare import COSINE_TOLERANCE, load_texts
+
+VECTOR_TOLERANCE = 0.01  # 1 - cosine between the torch and ONNX vector of the same text
+TOP_K = 3                # candidates returned by retrieval.faq_search.search_faqs
+
+
+def load_engines():
+    """Both engines, or None with the reason when either model is missing."""
+    from retrieval.embedding import EMBEDDING_ONNX_DIR, EmbeddingEngine
+    from retrieval.onnx_embedding import ONNX_MODEL_FILE
+
+    if not os.path.exists(os.path.join(EMBEDDING_ONNX_DIR, ONNX_MODEL_FILE)):
+        return None, f"no ONNX export in {EMBEDDING_ONNX_DIR}"
+    engines = {backend: EmbeddingEngine(backend=backend) for backend in ("torch", "onnx")}
+    try:
+        for engine in engines.values():
+            engine.encode("warm up")
+    except OSError as e:
+        return None, f"model weights not available: {e}"
+    return engines, None
+
+
+def ranking_mismatches(reference: np.ndarray, candidate: np.ndarray) -> int:
+    """Queries whose candidate top-1 differs or whose top-k pulls in a clearly worse question."""
+    mismatches = 0
+    for ref_scores, cand_scores in zip(reference, candidate):
+        ref_top = np.argsort(-ref_scores)[:TOP_K]
+        cand_top = np.argsort(-cand_scores)[:TOP_K]
+        # Near-ties (within the score tolerance) may swap places
+        floor = ref_scores[ref_top[-1]] - COSINE_TOLERANCE
+        if cand_top[0] != ref_top[0] or (ref_scores[cand_top] < floor).any():
+            mismatches += 1
+    return mismatches
+
+
+def main():
+    engines, reason = load_engines()
+    if engines is None:
+        print(f"SKIPPED: {reason}")
+        return
+
+    corpus, queries = load_texts()
+    vectors = {name: (engine.encode_batch(queries), engine.encode_batch(corpus)) for name, engine in engines.items()}
+    torch_queries, torch_corpus = vectors["torch"]
+    onnx_queries, onnx_corpus = vectors["onnx"]
+
+    # Rows are L2-normalized, so the row-wise dot product is the cosine
+    vector_cosine = np.concatenate([
+        (torch_queries * onnx_queries).sum(axis=1),
+        (torch_corpus * onnx_corpus).sum(axis=1),
+    ])
+    max_abs = float(np.abs(np.vstack([torch_queries, torch_corpus]) - np.vstack([onnx_queries, onnx_corpus])).max())
+    reference = torch_queries @ torch_corpus.T
+    candidate = onnx_queries @ onnx_corpus.T
+    score_diff = float(np.abs(reference - candidate).max())
+    mismatches = ranking_mismatches(reference, candidate)
+
+    print(f"{len(vector_cosine)} texts: min vector cosine {vector_cosine.min():.4f} (tolerance {1 - VECTOR_TOLERANCE}), "
+          f"max |component diff| {max_abs:.4f}")
+    print(f"{len(queries)} queries x {len(corpus)} questions: max |cosine diff| {score_diff:.4f} "
+          f"(tolerance {COSINE_TOLERANCE}), top-{TOP_K} ranking mismatches {mismatches}")
+
+    failures = []
+    if vector_cosine.min() < 1 - VECTOR_TOLERANCE:
+        failures.append("vector cosine")
+    if score_diff > COSINE_TOLERANCE:
+        failures.append("score difference")
+    if mismatches:
+        failures.append("ranking")
+    if failures:
+        sys.exit(f"FAILED: ONNX backend outside tolerance ({', '.join(failures)})")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
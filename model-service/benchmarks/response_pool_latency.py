@@ -0,0 +1,68 @@
+"""
+Fallback reply latency: live LLM generation vs. a pooled, pre-generated variant.
+
+Uses the service's Redis (config/redis.py) and Ollama (LLM_URL). The pool
+under test gets its own prompt name, so production pools are untouched; its
+key is deleted afterwards. For both paths the benchmark reports time to the
+first token and to the full reply, then prints the response_pool metrics.
+
+Run from the model-service directory:
+    python -m benchmarks.response_pool_latency
+    python -m benchmarks.response_pool_latency --requests 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from config.redis import redis_client
+from controllers.chatbot_controller import FALLBACK_PROMPT
+from models.llm import close_llm_session
+from models.llm_scheduler import llm_scheduler, PRIORITY_FALLBACK
+from models.response_pool import ResponsePool
+from utils import metrics
+
+POOL_NAME = "benchmark_fallback"
+
+
+async def timed(stream):
+    start = time.perf_counter()
+    first = None
+    async for _ in stream:
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+def summary(name, samples):
+    print(f"{name:<18} first token mean {statistics.mean(s[0] for s in samples) * 1000:8.1f} ms  "
+          f"full reply mean {statistics.mean(s[1] for s in samples) * 1000:8.1f} ms")
+
+
+async def main(requests: int, size: int):
+    pool = ResponsePool(size=size)
+    pool.register(POOL_NAME, FALLBACK_PROMPT)
+    try:
+        live = [await timed(llm_scheduler.stream(prompt=FALLBACK_PROMPT, priority=PRIORITY_FALLBACK)) for _ in range(min(requests, 5))]
+        summary("live generation", live)
+
+        await pool.refresh_all()
+        pooled = [await timed(pool.stream(POOL_NAME)) for _ in range(requests)]
+        summary("response pool", pooled)
+    finally:
+        await redis_client.delete(pool.key(POOL_NAME))
+        await pool.close()
+        await close_llm_session()
+
+    counters = metrics.snapshot()["counters"]
+    print(f"hits {counters.get(f'response_pool.{POOL_NAME}.hit', 0):.0f}, "
+          f"misses {counters.get(f'response_pool.{POOL_NAME}.miss', 0):.0f}, "
+          f"latency saved {counters.get('response_pool.latency_saved_ms', 0) / 1000:.1f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--size", type=int, default=5, help="variants in the pool")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.size))
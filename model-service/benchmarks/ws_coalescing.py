@@ -0,0 +1,87 @@
+"""
+Frames per answer and added latency of websocket token coalescing.
+
+A fake handle_chatbot streams a 300-token answer with jittered inter-token
+gaps (roughly a CPU-bound Ollama model). The turn runs through the real
+ConversationDispatcher; the fake socket JSON-encodes every frame like
+ws.send_json. For each setting the benchmark reports frames per answer,
+JSON encode time, time to the first and final frame, and how long each
+token waited in the coalescing buffer before it was sent.
+
+Run from the model-service directory:
+    python -m benchmarks.ws_coalescing
+"""
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from utils.conversation_dispatcher import ConversationDispatcher
+
+TOKENS = 300
+MEAN_TOKEN_GAP = 0.015   # seconds
+SETTINGS = [(0, 0), (25, 64), (50, 80), (100, 160), (250, 400)]  # (max_wait_ms, max_chars); 0 = off
+
+
+async def measure(max_wait_ms: float, max_chars: int):
+    rng = random.Random(0)
+    generated = []   # (time, cumulative chars) per token
+    sent = []        # (time, cumulative chars) per frame
+    encode_seconds = 0.0
+    done = asyncio.Event()
+    start = time.perf_counter()
+
+    async def fake_chatbot(payload):
+        chars = 0
+        for i in range(TOKENS):
+            await asyncio.sleep(rng.expovariate(1 / MEAN_TOKEN_GAP))
+            token = rng.choice([" the", " room", " is", " ready", ",", " breakfast", " at", " 7", "am", "."])
+            chars += len(token)
+            generated.append((time.perf_counter(), chars))
+            yield token, False
+        yield "", True
+
+    async def send(frame):
+        nonlocal encode_seconds
+        encode_start = time.perf_counter()
+        json.dumps(frame)
+        encode_seconds += time.perf_counter() - encode_start
+        chars = (sent[-1][1] if sent else 0) + len(frame["token"])
+        sent.append((time.perf_counter(), chars))
+        if frame["isFinal"]:
+            done.set()
+
+    dispatcher = ConversationDispatcher(fake_chatbot, send, coalesce_ms=max_wait_ms, coalesce_chars=max_chars)
+    dispatcher.submit({"conversationId": "c1", "question": "q"})
+    await done.wait()
+    await dispatcher.close()
+
+    # How long each token sat in the buffer: first frame whose cumulative length covers it
+    waits, frame = [], 0
+    for generated_at, chars in generated:
+        while sent[frame][1] < chars:
+            frame += 1
+        waits.append((sent[frame][0] - generated_at) * 1000)
+
+    return {
+        "frames": len(sent),
+        "encode_ms": encode_seconds * 1000,
+        "first_ms": (sent[0][0] - start) * 1000,
+        "final_ms": (sent[-1][0] - start) * 1000,
+        "wait_mean": statistics.mean(waits),
+        "wait_max": max(waits),
+    }
+
+
+async def main():
+    print(f"{TOKENS}-token answer, mean gap {MEAN_TOKEN_GAP * 1000:.0f} ms between tokens")
+    for max_wait_ms, max_chars in SETTINGS:
+        r = await measure(max_wait_ms, max_chars)
+        name = "off (frame per token)" if max_wait_ms <= 0 else f"{max_wait_ms:g} ms / {max_chars} chars"
+        print(f"{name:<22} frames {r['frames']:4d}  json {r['encode_ms']:6.2f} ms  first frame {r['first_ms']:7.1f} ms  "
+              f"final {r['final_ms']:7.1f} ms  token wait mean {r['wait_mean']:6.1f} ms  max {r['wait_max']:6.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,148 @@
+"""
+Check that a slow LLM answer on one conversation no longer delays the others
+on the shared /bot-reply-ws socket.
+
+A fake handle_chatbot streams tokens with a per-token delay: conversation
+"slow" takes several seconds per turn, the others a few tens of milliseconds.
+Frames are recorded by a fake socket sender. The check asserts that
+  * the fast conversations finish while the slow one is still streaming,
+  * turns of the same conversation never overlap and keep their order,
+  * no more than max_concurrency turns run at once,
+  * with pre-emption on, a message superseded while its conversation waits
+    for a free slot never runs; only the newer one does.
+The old sequential loop is timed on the same traffic for comparison.
+
+Run from the model-service directory:
+    python -m benchmarks.ws_concurrency_check
+"""
+import asyncio
+import time
+
+from utils.conversation_dispatcher import ConversationDispatcher
+
+SLOW_TOKEN_DELAY = 0.5     # seconds per token, "slow" conversation
+FAST_TOKEN_DELAY = 0.005
+TOKENS_PER_TURN = 6
+MAX_CONCURRENCY = 4
+
+
+class FakeChatbot:
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self.active_turns = set()
+
+    async def handle(self, payload):
+        conversation_id = payload["conversationId"]
+        assert conversation_id not in self.active_turns, f"{conversation_id} turns overlapped"
+        self.active_turns.add(conversation_id)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            delay = SLOW_TOKEN_DELAY if conversation_id == "slow" else FAST_TOKEN_DELAY
+            for i in range(TOKENS_PER_TURN):
+                await asyncio.sleep(delay)
+                yield f"{payload['question']}#{i} ", False
+            yield "", True
+        finally:
+            self.running -= 1
+            self.active_turns.discard(conversation_id)
+
+
+def traffic():
+    payloads = [{"conversationId": "slow", "question": "slow-1"}]
+    for turn in range(1, 4):
+        for guest in range(10):
+            payloads.append({"conversationId": f"guest-{guest}", "question": f"guest-{guest}-{turn}"})
+    payloads.append({"conversationId": "slow", "question": "slow-2"})
+    return payloads
+
+
+async def run_dispatcher():
+    bot = FakeChatbot()
+    finished = {}
+    frames = []
+    start = time.perf_counter()
+
+    async def send(frame):
+        frames.append(frame)
+        if frame.get("isFinal"):
+            finished.setdefault(frame["conversationId"], []).append(time.perf_counter() - start)
+
+    # Coalescing off, so every token is its own frame and the order check sees each one
+    dispatcher = ConversationDispatcher(bot.handle, send, max_concurrency=MAX_CONCURRENCY, coalesce_ms=0)
+    for payload in traffic():
+        dispatcher.submit(payload)
+    while len(finished.get("slow", [])) < 2:
+        await asyncio.sleep(0.01)
+    await dispatcher.close()
+    return bot, finished, frames
+
+
+async def run_sequential():
+    bot = FakeChatbot()
+    finished = {}
+    start = time.perf_counter()
+    for payload in traffic():
+        async for _, is_final in bot.handle(payload):
+            if is_final:
+                finished.setdefault(payload["conversationId"], []).append(time.perf_counter() - start)
+    return finished
+
+
+def check_order(frames):
+    seen = {}
+    for frame in frames:
+        token = frame["token"]
+        if not token:
+            continue
+        question, index = token.strip().rsplit("#", 1)
+        turn = int(question.rsplit("-", 1)[1])
+        last = seen.get(frame["conversationId"], (0, -1))
+        assert (turn, int(index)) > last, f"out of order frame in {frame['conversationId']}: {token}"
+        seen[frame["conversationId"]] = (turn, int(index))
+
+
+async def check_preempt_while_waiting():
+    """One slot, held by "slow"; guest-0 sends twice while waiting for it."""
+    bot = FakeChatbot()
+    frames = []
+
+    async def send(frame):
+        frames.append(frame)
+
+    dispatcher = ConversationDispatcher(bot.handle, send, max_concurrency=1, coalesce_ms=0, preempt=True)
+    dispatcher.submit({"conversationId": "slow", "question": "slow-1"})
+    await asyncio.sleep(0.05)
+    dispatcher.submit({"conversationId": "guest-0", "question": "guest-0-1"})
+    await asyncio.sleep(0.05)  # guest-0's worker is now waiting for the slot
+    dispatcher.submit({"conversationId": "guest-0", "question": "guest-0-2"})
+    while not any(f["conversationId"] == "guest-0" and f.get("isFinal") for f in frames):
+        await asyncio.sleep(0.01)
+    await dispatcher.close()
+
+    answered = {f["token"].split("#")[0] for f in frames if f["conversationId"] == "guest-0" and f["token"]}
+    print(f"preempted while waiting for a slot: guest-0 answered {sorted(answered)}")
+    assert answered == {"guest-0-2"}, "a superseded message still took the slot"
+
+
+async def main():
+    bot, finished, frames = await run_dispatcher()
+    check_order(frames)
+    fast_done = max(times[-1] for conversation, times in finished.items() if conversation != "slow")
+    slow_first = finished["slow"][0]
+    print(f"dispatcher : fast guests done after {fast_done:.2f} s, slow turn 1 after {slow_first:.2f} s, "
+          f"slow turn 2 after {finished['slow'][1]:.2f} s, peak concurrency {bot.peak}")
+    assert fast_done < slow_first, "fast conversations waited for the slow one"
+    assert bot.peak <= MAX_CONCURRENCY
+
+    sequential = await run_sequential()
+    fast_done_sequential = max(times[-1] for conversation, times in sequential.items() if conversation != "slow")
+    print(f"sequential : fast guests done after {fast_done_sequential:.2f} s")
+
+    await check_preempt_while_waiting()
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -25,7 +25,16 @@ TEMPLATES = {
     "ask_contact_name": "May I have your full name for the booking?",
     "ask_contact_email": "Could you please provide your email address?",
     "ask_contact_number": "Can I have your contact number, please?",
-    "confirm_booking_details": "Please confirm that all the information above is correct before I create your booking.",
+    "confirm_booking_details": (
+        "Here are your booking details:\n"
+        "- Check-in: {ask_check_in_date}\n"
+        "- Check-out: {ask_check_out_date}\n"
+        "- Room type: {ask_room_type}\n"
+        "- Name: {ask_contact_name}\n"
+        "- Email: {ask_contact_email}\n"
+        "- Phone: {ask_contact_number}\n"
+        "Please confirm that all the information above is correct before I create your booking."
+    ),
 
     "ask_issue_detail": "Could you describe the issue you're facing?",
     "apologize_and_log": "We’re sorry to hear that. We've logged your complaint and will follow up soon.",
@@ -36,6 +45,23 @@ TEMPLATES = {
     "provide_status": "Your order is being processed. We'll notify you once it's ready.",
 }
 
+# ---------------------------- Step render mode ---------------------------- #
+# "template": render TEMPLATES[step] locally ({slot} placeholders filled from the
+#             collected entities) and stream it at once, no LLM call.
+# "llm":      let the LLM rephrase the rendered template (slower, more conversational).
+TEMPLATE_MODE = "template"
+LLM_MODE = "llm"
+DEFAULT_STEP_MODE = LLM_MODE
+STEP_MODES = {
+    "ask_check_in_date": LLM_MODE,   # first reply of the flow, acknowledges the booking request
+    "ask_check_out_date": TEMPLATE_MODE,
+    "ask_room_type": TEMPLATE_MODE,
+    "ask_contact_name": TEMPLATE_MODE,
+    "ask_contact_email": TEMPLATE_MODE,
+    "ask_contact_number": TEMPLATE_MODE,
+    "confirm_booking_details": TEMPLATE_MODE,
+}
+
  
 # ---------------------------- No suggestion returned -----------#
 NO_SUGGESTION_INTENTS = {"goodbye", "chat"}
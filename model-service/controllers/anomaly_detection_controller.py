@@ -3,7 +3,6 @@ import joblib
 from classes.interface import BookingSession
 from classes.interface import BookingList
 import pandas as pd
-from models.bookingAnomalyDetection import detect_booking_anomalies
 from datetime import datetime, timedelta, timezone
 from config.mongoDB import db
 from fastapi.encoders import jsonable_encoder
@@ -119,6 +118,9 @@ async def anomaly_detection_booking():
     if not docs:
         return []
     
+    # Imported on first use: the LSTM autoencoder pulls in torch, which the chat path can do without
+    from models.bookingAnomalyDetection import detect_booking_anomalies
+
     df = pd.DataFrame(docs)
     df_result = detect_booking_anomalies(df)
     print(f"df_result: {df_result}")
@@ -1,22 +1,77 @@
 from fastapi.responses import JSONResponse
 from fastapi import Request
 from config.redis import redis_client
-from utils.intent_detector import detect_intent
-from constants.FSM_constant import FSM, TEMPLATES, NO_SUGGESTION_INTENTS
-from models import stream_llm
+from utils.intent_detector import detect_intent, match_keyword_intent, HANDOFF_INTENT, INTENT_MIN_CONFIDENCE
+from constants.FSM_constant import FSM, TEMPLATES, NO_SUGGESTION_INTENTS, STEP_MODES, DEFAULT_STEP_MODE, TEMPLATE_MODE
+from models import llm_scheduler, PRIORITY_BOOKING, PRIORITY_FAQ
+from models.response_pool import response_pool, is_usable_reply
 from retrieval import find_best_faq
+from retrieval.answer_cache import answer_cache
 from utils.entity_extractor import extract_entities
-from utils.extract_entities_for_booking_session import extract_entities_for_booking_session
-from typing import Dict
+from utils.extract_entities_for_booking_session import extract_entities_for_booking_session, EMAIL_PATTERN, PHONE_PATTERN
+from utils.turn_features import TurnFeatures
+from typing import Dict, Optional
 from datetime import datetime
 import json
 from typing import AsyncGenerator, Any
 from utils.bookings import get_all_room_types
+from utils.chunkedStream import chunkedStream
+from utils import metrics
 import inspect
 import json
 
 
+HANDOFF_PROMPT = """
+You are Harold, a polite and professional hotel assistant.
+
+The user has requested to speak with a human agent.
+
+Your task:
+- Politely acknowledge the request.
+- Clearly inform the user that they are being transferred to a customer service representative.
+- Keep the reply short (1–2 sentences).
+"""
+
+FALLBACK_PROMPT = (
+    "Write a professional and polite fallback response for a chatbot. "
+    "The response should: "
+    "1) Acknowledge that it cannot find an exact answer, "
+    "2) Apologize politely, "
+    "3) Offer to connect the user with a customer service agent for further assistance."
+)
+
+HANDOFF_PARAPHRASES = [
+    "Of course. I'm transferring you to one of our customer service representatives now.",
+    "Certainly, I'll connect you with a member of our customer service team right away.",
+    "No problem. Please hold on while I transfer you to a customer service representative.",
+    "I understand. A customer service representative will be with you shortly; transferring you now.",
+]
+
+FALLBACK_PARAPHRASES = [
+    "I'm sorry, I couldn't find an exact answer to your question. Would you like me to connect you with a customer service agent?",
+    "Apologies, I don't have a precise answer for that. I'd be happy to put you in touch with a customer service agent who can help.",
+    "I'm sorry, that's not something I can answer exactly. Shall I connect you with one of our customer service agents for further assistance?",
+    "Unfortunately I couldn't find the exact answer. Please let me know if you'd like me to transfer you to a customer service agent.",
+]
+
+# These prompts never change, so their replies are pre-generated instead of generated per turn
+response_pool.register("handoff", HANDOFF_PROMPT, HANDOFF_PARAPHRASES)
+response_pool.register("fallback", FALLBACK_PROMPT, FALLBACK_PARAPHRASES)
+
+
 async def handle_chatbot(payload: dict) -> AsyncGenerator[tuple[Any, bool], None]:
+    # One feature context per turn: every helper below reuses the same text representations
+    question = payload.get("question")
+    features = TurnFeatures(question.strip() if question else "")
+    try:
+        async for item in handle_chatbot_turn(payload, features):
+            yield item
+    finally:
+        if features.computed:
+            features.log()
+
+
+async def handle_chatbot_turn(payload: dict, features: TurnFeatures) -> AsyncGenerator[tuple[Any, bool], None]:
     conversationId = payload.get("conversationId") 
     question = payload.get("question")
     user_input = question.strip() if question else ""
@@ -30,19 +85,10 @@ async def handle_chatbot(payload: dict) -> AsyncGenerator[tuple[Any, bool], None
     await update_conversation_context(str(conversationId), str(senderType), user_input)
     chat_context = await get_conversation_context(conversationId)
     # --- User requests to be transferred to manual customer service ---
-    if any(kw in user_input.lower() for kw in ["human", "customer service", "real people", "agent", "transfer to manual", "real agent", "real human", "real assistant"]):
+    if match_keyword_intent(user_input, features) == HANDOFF_INTENT:
         await redis_client.delete(conversationId)
-        prompt = """
-You are Harold, a polite and professional hotel assistant.
-
-The user has requested to speak with a human agent.
-
-Your task:
-- Politely acknowledge the request.
-- Clearly inform the user that they are being transferred to a customer service representative.
-- Keep the reply short (1–2 sentences).
-"""
-        async for token in stream_llm(prompt=prompt):
+        # Constant prompt: served from the pre-generated response pool
+        async for token in response_pool.stream("handoff"):
             yield token, False
         yield "", True
 
@@ -61,14 +107,16 @@ Your task:
     
     step = 0
     intent = None
+    detected = None
 
     # --- new conversation ---
     if not current_state:
-        intent = await detect_intent(user_input)
-        print(f"intent detected: {intent}")
+        detected = await detect_intent(user_input, features)
+        intent = detected.intent
+        print(f"intent detected: {intent} ({detected.source}, confidence {detected.confidence:.2f})")
 
-        # Set the initial state
-        if intent in FSM:
+        # Set the initial state; an uncertain guess goes to FAQ search instead of starting a flow
+        if intent in FSM and detected.confidence >= INTENT_MIN_CONFIDENCE:
             await redis_client.set(conversationId, f"{intent}:0")
             print(f"[DEBUG] Set new state: {intent}:0")
         else:
@@ -92,18 +140,42 @@ Your task:
             senderType=senderType,
             senderId=senderId,
             step=step,
-            current_state=current_state
+            current_state=current_state,
+            features=features,
         ):
             yield token, is_final
         return
 
     # --- If it is not the booking process, check the FAQ ---
-    score, faq = await find_best_faq(query=user_input)
+    score, faq = await find_best_faq(
+        query=user_input,
+        intent=detected.intent if detected else None,
+        confidence=detected.confidence if detected else 0.0,
+        features=features,
+    )
     print("FAQ found:", faq)
     print("Score:", score)
     
     # Use FAQ only when there is no active conversation
     if faq.get("answer") and score >= 0.5:
+        # Reply written at ingest time (script.py); only present while it matches the answer
+        if faq.get("reply"):
+            metrics.increment("faq.pregenerated_reply")
+            async for chunk, _ in chunkedStream(faq["reply"]):
+                yield chunk, False
+            yield "", True
+            await update_conversation_context(conversationId,senderType, user_input)
+            return
+
+        # Near-identical questions about the same FAQ reuse an earlier reply
+        cached_reply = await answer_cache.get(user_input, faq, features)
+        if cached_reply is not None:
+            async for chunk, _ in chunkedStream(cached_reply):
+                yield chunk, False
+            yield "", True
+            await update_conversation_context(conversationId,senderType, user_input)
+            return
+
         prompt = f"""
 You are Harold, a polite and professional hotel assistant.
 
@@ -126,28 +198,27 @@ A: {faq['answer']}
 
 User Question: "{user_input}"
 """
-        async for token in stream_llm(prompt=prompt):
+        tokens = []
+        async for token in llm_scheduler.stream(prompt=prompt, priority=PRIORITY_FAQ):
+            tokens.append(token)
             yield token, False
         yield "", True
+        reply = "".join(tokens)
+        if is_usable_reply(reply):
+            await answer_cache.set(user_input, faq, reply, features)
         await update_conversation_context(conversationId,senderType, user_input)
         return
 
     # --- Fallback ---
-    prompt = (
-        "Write a professional and polite fallback response for a chatbot. "
-        "The response should: "
-        "1) Acknowledge that it cannot find an exact answer, "
-        "2) Apologize politely, "
-        "3) Offer to connect the user with a customer service agent for further assistance."
-    )
-    async for token in stream_llm(prompt=prompt):
+    async for token in response_pool.stream("fallback"):
         yield token, False
     yield "", True
     await update_conversation_context(conversationId,senderType, user_input)
 
 
-async def handle_booking_flow(conversationId: str, user_input: str, senderType: str, senderId: str, step: int, current_state: str):
+async def handle_booking_flow(conversationId: str, user_input: str, senderType: str, senderId: str, step: int, current_state: str, features: Optional[TurnFeatures] = None):
     """Handling the booking process"""
+    features = features or TurnFeatures(user_input)
     steps = FSM["booking"]
     
     print(f"[BOOKING FLOW] Step: {step}, Total steps: {len(steps)}")
@@ -166,7 +237,7 @@ async def handle_booking_flow(conversationId: str, user_input: str, senderType:
         await redis_client.hset(f"{conversationId}:entities", prev_step_key, user_input) #type: ignore
         
         # Try to extract structured entities
-        extracted = await extract_specific_entity(user_input, prev_step_key)
+        extracted = await extract_specific_entity(user_input, prev_step_key, features)
         if extracted:
             entity_key, entity_value = extracted
             await redis_client.hset(f"{conversationId}:entities", entity_key, entity_value) #type: ignore
@@ -191,13 +262,21 @@ async def handle_booking_flow(conversationId: str, user_input: str, senderType:
         await redis_client.set(conversationId, f"booking:{step}")
         
         # Generate prompts for the next step
-        template_text = TEMPLATES.get(next_step, f"Please provide your {next_step}")
-        prompt = await build_booking_prompt(next_step, template_text, saved_entities, user_input)
+        template_text = render_booking_template(TEMPLATES.get(next_step, f"Please provide your {next_step}"), saved_entities)
 
-        # Add available room list if present
-        prompt += extra_info
-        async for token in stream_llm(prompt=prompt):
-            yield token, False
+        if STEP_MODES.get(next_step, DEFAULT_STEP_MODE) == TEMPLATE_MODE:
+            # Fixed question with the slots filled in: stream it right away, no LLM round trip
+            metrics.increment("booking.template_steps")
+            async for chunk, _ in chunkedStream(template_text + extra_info):
+                yield chunk, False
+        else:
+            metrics.increment("booking.llm_steps")
+            prompt = await build_booking_prompt(next_step, template_text, saved_entities, user_input)
+
+            # Add available room list if present
+            prompt += extra_info
+            async for token in llm_scheduler.stream(prompt=prompt, priority=PRIORITY_BOOKING):
+                yield token, False
         yield "", True
         await update_conversation_context(conversationId,senderType, user_input)
 
@@ -217,14 +296,15 @@ async def handle_booking_flow(conversationId: str, user_input: str, senderType:
             user_input=user_input,
             userType=senderType,
             conversationId=conversationId,
-            senderId=senderId
+            senderId=senderId,
+            features=features,
         )
         
         if booking_result:
             confirm_link, error = booking_result
             print(f"[BOOKING FLOW] Booking result - Link: {confirm_link}, Error: {error}")
             if error:
-                async for token in stream_llm(prompt=f"Sorry, there was an error: {error}"):
+                async for token in llm_scheduler.stream(prompt=f"Sorry, there was an error: {error}", priority=PRIORITY_BOOKING):
                     yield token, False
                 yield "", True
             else:
@@ -236,7 +316,7 @@ async def handle_booking_flow(conversationId: str, user_input: str, senderType:
 
     Thank you for choosing our hotel!
     """
-                async for token in stream_llm(prompt=success_message):
+                async for token in llm_scheduler.stream(prompt=success_message, priority=PRIORITY_BOOKING):
                     yield token, False
                 yield "", True
 
@@ -246,14 +326,15 @@ async def handle_booking_flow(conversationId: str, user_input: str, senderType:
         return
 
 
-async def extract_specific_entity(text: str, step_key: str) -> tuple[str, str] | None:
+async def extract_specific_entity(text: str, step_key: str, features: Optional[TurnFeatures] = None) -> tuple[str, str] | None:
     """Extract specific entities based on step keys"""
+    features = features or TurnFeatures(text)
     if step_key == "checkInDate":
-        date = await extract_date_entity(text)
+        date = await extract_date_entity(text, features)
         if date:
             return "checkInDate", date
     elif step_key == "checkOutDate":
-        date = await extract_date_entity(text)
+        date = await extract_date_entity(text, features)
         if date:
             return "checkOutDate", date
     elif step_key == "roomTypes":
@@ -261,21 +342,32 @@ async def extract_specific_entity(text: str, step_key: str) -> tuple[str, str] |
         if room_type:
             return "roomTypes", room_type
     elif step_key == "contactName":
-        name = await extract_name(text)
+        name = await extract_name(text, features)
         if name:
             return "contactName", name
     elif step_key == "contactEmail":
-        email = await extract_email(text)
+        email = await extract_email(text, features)
         if email:
             return "contactEmail", email
     elif step_key == "contactNumber":
-        phone = await extract_phone(text)
+        phone = await extract_phone(text, features)
         if phone:
             return "contactNumber", phone
     
     return None
 
 
+class _MissingSlot(dict):
+    def __missing__(self, key):
+        return "-"
+
+
+def render_booking_template(template: str, saved_entities: Dict[str, str]) -> str:
+    """Fill {slot} placeholders with the collected entities; slots not collected yet show as "-"."""
+    slots = _MissingSlot({key: value.strip() for key, value in saved_entities.items() if value and value.strip()})
+    return template.format_map(slots)
+
+
 async def build_booking_prompt(step: str, template: str, saved_entities: Dict[str, str], user_input: str) -> str:
     """Tips for structuring booking process"""
     context_info = ""
@@ -307,10 +399,9 @@ Keep your response focused and natural. Do not list multiple questions at once.
 
 
 # Simplified entity extraction helper functions
-async def extract_date_entity(text: str) -> str:
+async def extract_date_entity(text: str, features: Optional[TurnFeatures] = None) -> str:
     """extract date entity"""
-    import re
-    from datetime import datetime
+    features = features or TurnFeatures(text)
     
     # Date format matching
     date_patterns = [
@@ -319,7 +410,7 @@ async def extract_date_entity(text: str) -> str:
     ]
     
     for pattern in date_patterns:
-        match = re.search(pattern, text)
+        match = features.search(pattern)
         if match:
             try:
                 if '/' in text or '-' in text:
@@ -342,26 +433,22 @@ async def extract_room_type(text: str) -> str:
     
     return ""
 
-async def extract_name(text: str) -> str:
+async def extract_name(text: str, features: Optional[TurnFeatures] = None) -> str:
     """extra name entity"""
     # Simple implementation - more complex NLP should be used in real applications
-    import re
     name_pattern = r'[A-Z][a-z]+ [A-Z][a-z]+'
-    match = re.search(name_pattern, text)
+    match = (features or TurnFeatures(text)).search(name_pattern)
     return match.group() if match else ""
 
-async def extract_email(text: str) -> str:
+async def extract_email(text: str, features: Optional[TurnFeatures] = None) -> str:
     """extra email entity"""
-    import re
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    match = re.search(email_pattern, text)
+    # Same pattern as the final booking extraction, so the match is shared within the turn
+    match = (features or TurnFeatures(text)).search(EMAIL_PATTERN)
     return match.group() if match else ""
 
-async def extract_phone(text: str) -> str:
+async def extract_phone(text: str, features: Optional[TurnFeatures] = None) -> str:
     """extract phone number entity"""
-    import re
-    phone_pattern = r'(\+?(\d{1,3})?[\s-]?)?(\(?\d{3}\)?[\s-]?\d{3,4}[\s-]?\d{3,4})'
-    match = re.search(phone_pattern, text)
+    match = (features or TurnFeatures(text)).search(PHONE_PATTERN)
     return match.group() if match else ""
 
 
@@ -7,4 +7,5 @@ root_dir = os.path.abspath(os.path.join(current_dir, "../../"))
 sys.path.append(root_dir)
 
 from .llm import stream_llm
-from .intentModel import predict_intent
\ No newline at end of file
+from .llm_scheduler import llm_scheduler, PRIORITY_BOOKING, PRIORITY_FAQ, PRIORITY_FALLBACK
+from .intentModel import predict_intent, predict_intents, predict_intents_from_counts, intent_token_ids
\ No newline at end of file
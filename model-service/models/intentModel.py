@@ -1,12 +1,17 @@
-import torch
 import numpy as np
 import pickle
-from torch import nn
+from typing import List, Tuple
 import os
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # directory of intentModel.py
 vectorizer_path = os.path.join(BASE_DIR, "load_dict", "vectorizer.pkl")
 
+# ---------- Intent classifier settings ---------- #
+# "torch" (intent_classifier.pth) or "numpy" (intent_classifier.npz, no PyTorch import)
+INTENT_BACKEND = os.getenv("INTENT_BACKEND", "torch")
+INTENT_WEIGHTS_PATH = "models/load_dict/intent-classifier/intent_classifier.pth"
+INTENT_NPZ_PATH = "models/load_dict/intent-classifier/intent_classifier.npz"
+
 # ----- Load encoders -----
 with open("models/load_dict/intent-classifier/vectorizer.pkl", "rb") as f:
     vectorizer = pickle.load(f)
@@ -14,37 +19,64 @@ with open("models/load_dict/intent-classifier/vectorizer.pkl", "rb") as f:
 with open("models/load_dict/intent-classifier/label_encoder.pkl", "rb") as f:
     label_encoder = pickle.load(f)
 
-# ----- Model class -----
-class IntentClassifier(nn.Module):
-    def __init__(self, input_dim, output_dim, hidden_units=128):
-        super().__init__()
-        self.net = nn.Sequential(
-            nn.Linear(input_dim, hidden_units),
-            nn.ReLU(),
-            nn.Linear(hidden_units, hidden_units),
-            nn.ReLU(),
-            nn.Linear(hidden_units, output_dim)
-        )
-    def forward(self, x): 
-        return self.net(x)
+
+def load_intent_backend(backend: str):
+    if backend == "numpy":
+        from .intent_numpy import NumpyIntentBackend
+        return NumpyIntentBackend(INTENT_NPZ_PATH)
+    if backend == "torch":
+        from .intent_torch import TorchIntentBackend
+        input_dim = len(vectorizer.get_feature_names_out())
+        output_dim = len(label_encoder.classes_)
+        return TorchIntentBackend(INTENT_WEIGHTS_PATH, input_dim, output_dim)
+    raise ValueError(f"Unknown INTENT_BACKEND: {backend}")
+
 
 # ----- Load model -----
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-input_dim = len(vectorizer.get_feature_names_out())
-output_dim = len(label_encoder.classes_)
+intent_backend = load_intent_backend(INTENT_BACKEND)
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
 
-model = IntentClassifier(input_dim, output_dim).to(device)
-model.load_state_dict(torch.load("models/load_dict/intent-classifier/intent_classifier.pth", map_location=device))
-model.eval()
 
 # ----- Prediction -----
+def intent_counts(texts: List[str]):
+    """CSR matrix of token counts over the classifier's vocabulary, one row per text."""
+    return vectorizer.transform(texts)
+
+
+def token_ids_from_counts(counts) -> Tuple[int, ...]:
+    """
+    Sorted vocabulary ids of the words in a single-row count matrix, with repeats.
+    Two texts with the same ids get the same token counts, hence the same prediction.
+    """
+    row = counts.tocsr()
+    return tuple(np.sort(np.repeat(row.indices, row.data)).tolist())
+
+
+def intent_token_ids(text: str) -> Tuple[int, ...]:
+    return token_ids_from_counts(intent_counts([text]))
+
+
+def predict_intents_from_counts(counts) -> List[Tuple[str, float]]:
+    """(intent, softmax confidence) for every row of an intent_counts matrix, in one forward pass."""
+    if counts.shape[0] == 0:
+        return []
+    probabilities = softmax(intent_backend.logits(counts))
+    prediction_indices = probabilities.argmax(axis=1)
+    confidences = probabilities[np.arange(counts.shape[0]), prediction_indices]
+    intents = label_encoder.inverse_transform(prediction_indices)
+    return list(zip(intents.tolist(), confidences.tolist()))
+
+
+def predict_intents(texts: List[str]) -> List[Tuple[str, float]]:
+    """(intent, softmax confidence) for every text, in one forward pass."""
+    if not texts:
+        return []
+    return predict_intents_from_counts(intent_counts(texts))
+
+
 def predict_intent(text: str) -> str:
-    text_vector = vectorizer.transform([text])
-    # Create a new copy data array if the array is not a same datatype then make it a new copy of numpy array
-    dense_vector = np.asarray(text_vector.todense())
-    text_tensor = torch.tensor(dense_vector, dtype=torch.float32).to(device)
-
-    with torch.inference_mode():
-        output = model(text_tensor)
-        prediction_index = output.argmax(dim=1).item()
-        return label_encoder.inverse_transform([prediction_index])[0]
+    return predict_intents([text])[0][0]
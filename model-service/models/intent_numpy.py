@@ -0,0 +1,31 @@
+import os
+
+import numpy as np
+
+# Layer order of IntentClassifier.net: Linear, ReLU, Linear, ReLU, Linear
+NPZ_LAYERS = ("0", "2", "4")
+
+
+class NumpyIntentBackend:
+    """
+    Torch-free inference for the intent MLP, using the .npz weights written
+    by models/train_model/train_model_intent_classifier.py.
+    The first layer multiplies the scipy CSR token counts directly, so only
+    the columns of the words present in a text are touched.
+    """
+
+    def __init__(self, weights_path: str):
+        if not os.path.exists(weights_path):
+            raise RuntimeError(f"{weights_path} not found, run: python models/train_model/train_model_intent_classifier.py --export-only")
+        with np.load(weights_path) as weights:
+            # Stored as (out, in) like torch; kept transposed for x @ W
+            self.layers = [
+                (np.ascontiguousarray(weights[f"weight{layer}"].T, dtype=np.float32), weights[f"bias{layer}"].astype(np.float32))
+                for layer in NPZ_LAYERS
+            ]
+
+    def logits(self, counts) -> np.ndarray:
+        (w1, b1), (w2, b2), (w3, b3) = self.layers
+        hidden = np.maximum(counts.astype(np.float32) @ w1 + b1, 0)
+        hidden = np.maximum(hidden @ w2 + b2, 0)
+        return hidden @ w3 + b3
@@ -0,0 +1,46 @@
+import numpy as np
+import torch
+from torch import nn
+
+# ----- Model class -----
+class IntentClassifier(nn.Module):
+    def __init__(self, input_dim, output_dim, hidden_units=128):
+        super().__init__()
+        self.net = nn.Sequential(
+            nn.Linear(input_dim, hidden_units),
+            nn.ReLU(),
+            nn.Linear(hidden_units, hidden_units),
+            nn.ReLU(),
+            nn.Linear(hidden_units, output_dim)
+        )
+    def forward(self, x): 
+        return self.net(x)
+
+
+def sparse_logits(net: nn.Sequential, counts) -> torch.Tensor:
+    """
+    Logits for a scipy CSR batch of token counts without densifying it.
+    The first Linear layer becomes a sparse x dense matmul, so the cost
+    follows the tokens present in each text instead of the vocabulary size.
+    """
+    first_layer = net[0]
+    coo = counts.tocoo()
+    indices = torch.from_numpy(np.vstack([coo.row, coo.col]).astype(np.int64))
+    values = torch.from_numpy(coo.data.astype(np.float32))
+    sparse_batch = torch.sparse_coo_tensor(indices, values, coo.shape, device=first_layer.weight.device)
+    hidden = torch.sparse.mm(sparse_batch, first_layer.weight.t()) + first_layer.bias
+    return net[1:](hidden)
+
+
+class TorchIntentBackend:
+    """The trained PyTorch MLP, loaded from intent_classifier.pth."""
+
+    def __init__(self, weights_path: str, input_dim: int, output_dim: int):
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.model = IntentClassifier(input_dim, output_dim).to(self.device)
+        self.model.load_state_dict(torch.load(weights_path, map_location=self.device))
+        self.model.eval()
+
+    def logits(self, counts) -> np.ndarray:
+        with torch.inference_mode():
+            return sparse_logits(self.model.net, counts).cpu().numpy()
@@ -1,15 +1,60 @@
 import aiohttp
-import json
 import asyncio
+import os
+from typing import Optional
 
-LLM_URL   = "http://localhost:11434/api/generate"
-LLM_MODEL = "mistral"
+from utils import metrics
+from utils.ndjson_stream import NDJSONStream
+
+LLM_URL   = os.getenv("LLM_URL", "http://localhost:11434/api/generate")
+LLM_MODEL = os.getenv("LLM_MODEL", "mistral")
 TIMEOUT   = 30  # seconds
 
+# ---------- Pooled HTTP client settings ---------- #
+LLM_POOL_LIMIT = int(os.getenv("LLM_POOL_LIMIT", "100"))                    # open connections in total
+LLM_POOL_LIMIT_PER_HOST = int(os.getenv("LLM_POOL_LIMIT_PER_HOST", "32"))   # to the Ollama host
+LLM_DNS_CACHE_TTL = int(os.getenv("LLM_DNS_CACHE_TTL", "300"))              # seconds
+LLM_KEEPALIVE_TIMEOUT = float(os.getenv("LLM_KEEPALIVE_TIMEOUT", "60"))     # idle seconds before a pooled connection closes
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+async def open_llm_session() -> aiohttp.ClientSession:
+    """
+    Create the process-wide Ollama session (called from the FastAPI lifespan).
+    Every generation reuses its pooled keep-alive connections instead of
+    paying for a new connector, DNS lookup and TCP handshake.
+    """
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=LLM_POOL_LIMIT,
+            limit_per_host=LLM_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=LLM_DNS_CACHE_TTL,
+            keepalive_timeout=LLM_KEEPALIVE_TIMEOUT,
+        )
+        _session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=TIMEOUT))
+    return _session
+
+
+async def close_llm_session():
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+def record_cancelled_generation(received: int):
+    """Count an aborted generation and estimate the tokens it did not have to produce."""
+    metrics.increment("llm.cancelled")
+    metrics.increment("llm.tokens_saved", max(0.0, metrics.average("llm.completion_tokens") - received))
+
+
 async def stream_llm(prompt: str):
     """
     Stream tokens from local Ollama server as they are generated.
     Handles timeouts and connection issues gracefully.
+    If the consumer stops early (task cancelled, generator closed) the HTTP
+    response is closed at once, which makes Ollama abort the generation.
     """
     payload = {
         "model":  LLM_MODEL,
@@ -19,28 +64,30 @@ async def stream_llm(prompt: str):
     }
 
     try:
-        timeout = aiohttp.ClientTimeout(total=TIMEOUT)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.post(LLM_URL, json=payload) as resp:
-                if resp.status != 200:
-                    yield f"[Error] LLM server returned status {resp.status}"
-                    return
-
-                buffer = b""
-                async for chunk in resp.content.iter_chunked(1024):
-                    buffer += chunk
-                    while b"\n" in buffer:
-                        line, buffer = buffer.split(b"\n", 1)
-                        if not line.strip():
-                            continue
-                        try:
-                            data = json.loads(line.decode("utf-8"))
-                        except json.JSONDecodeError:
-                            continue
+        # Scripts outside the FastAPI app get the shared session lazily
+        session = await open_llm_session()
+        async with session.post(LLM_URL, json=payload) as resp:
+            if resp.status != 200:
+                yield f"[Error] LLM server returned status {resp.status}"
+                return
 
+            # Lines are split and parsed incrementally, without re-copying the buffered bytes
+            lines = NDJSONStream()
+            received = 0
+            try:
+                async for chunk in resp.content.iter_any():
+                    for data in lines.feed(chunk):
+                        if data.get("done"):
+                            metrics.observe("llm.completion_tokens", data.get("eval_count", received))
                         token = data.get("response")
                         if token:
+                            received += 1
                             yield token
+            except (asyncio.CancelledError, GeneratorExit):
+                # Dropping the connection is what stops Ollama; releasing it to the pool would not
+                resp.close()
+                record_cancelled_generation(received)
+                raise
 
     except asyncio.TimeoutError:
         yield "[Error] LLM request timed out."
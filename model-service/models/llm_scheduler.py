@@ -0,0 +1,112 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from typing import AsyncGenerator, List, Optional, Tuple
+
+from utils import metrics
+from .llm import stream_llm
+
+# ---------- LLM admission settings ---------- #
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "2"))           # generations sent to Ollama at once
+LLM_QUEUE_DEADLINE = float(os.getenv("LLM_QUEUE_DEADLINE", "15"))      # seconds a turn may wait for a slot
+LLM_BUSY_MESSAGE = os.getenv(
+    "LLM_BUSY_MESSAGE",
+    "I'm sorry, I'm assisting a lot of guests right now. Please try again in a moment.",
+)
+
+# Lower value = served first
+PRIORITY_BOOKING = 0    # interactive booking-flow turns
+PRIORITY_FAQ = 1        # FAQ answers
+PRIORITY_FALLBACK = 2   # fallback and human handoff messages
+
+PRIORITY_NAMES = {PRIORITY_BOOKING: "booking", PRIORITY_FAQ: "faq", PRIORITY_FALLBACK: "fallback"}
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the single local Ollama instance.
+    At most max_in_flight generations stream at once; the rest wait in a
+    priority queue (booking, then FAQ, then fallback/handoff, FIFO within a
+    class) and a finished generation hands its slot straight to the next
+    waiter. A turn that cannot get a slot within queue_deadline gets the
+    busy message instead of making every other guest slower; background
+    work (wait_for_slot=True) has no guest waiting and queues until served.
+    """
+
+    def __init__(self, max_in_flight: int = LLM_MAX_IN_FLIGHT, queue_deadline: float = LLM_QUEUE_DEADLINE):
+        self.max_in_flight = max_in_flight
+        self.queue_deadline = queue_deadline
+        self.in_flight = 0
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []   # heap of (priority, arrival, future)
+        self.arrivals = itertools.count()
+
+    async def stream(self, prompt: str, priority: int = PRIORITY_FAQ, wait_for_slot: bool = False) -> AsyncGenerator[str, None]:
+        """stream_llm behind the admission queue; yields LLM_BUSY_MESSAGE when the deadline passes."""
+        name = PRIORITY_NAMES.get(priority, str(priority))
+        queued_at = time.perf_counter()
+        if not await self._acquire(priority, None if wait_for_slot else self.queue_deadline):
+            metrics.increment("llm_scheduler.busy")
+            metrics.increment(f"llm_scheduler.busy.{name}")
+            yield LLM_BUSY_MESSAGE
+            return
+        metrics.observe(f"llm_scheduler.wait_ms.{name}", (time.perf_counter() - queued_at) * 1000)
+
+        try:
+            async for token in stream_llm(prompt=prompt):
+                yield token
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: int, deadline: Optional[float]) -> bool:
+        if self.in_flight < self.max_in_flight and not self.waiters:
+            self._admit()
+            return True
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.arrivals), future))
+        self._publish()
+        try:
+            # The slot is handed over by _release, already counted in in_flight
+            await asyncio.wait_for(asyncio.shield(future), deadline)
+            return True
+        except asyncio.TimeoutError:
+            return self._withdraw(future)
+        except asyncio.CancelledError:
+            if not self._withdraw(future):
+                raise
+            # Granted a slot just as the turn was cancelled; give it to the next waiter
+            self._release()
+            raise
+
+    def _withdraw(self, future: asyncio.Future) -> bool:
+        """Leave the queue; True when a slot was granted in the meantime."""
+        if future.done():
+            return True
+        future.cancel()
+        self.waiters = [entry for entry in self.waiters if entry[2] is not future]
+        heapq.heapify(self.waiters)
+        self._publish()
+        return False
+
+    def _admit(self):
+        self.in_flight += 1
+        self._publish()
+
+    def _release(self):
+        self.in_flight -= 1
+        while self.waiters:
+            _, _, future = heapq.heappop(self.waiters)
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+                break
+        self._publish()
+
+    def _publish(self):
+        metrics.set_gauge("llm_scheduler.in_flight", self.in_flight)
+        metrics.set_gauge("llm_scheduler.queue_depth", len(self.waiters))
+
+
+llm_scheduler = LLMScheduler()
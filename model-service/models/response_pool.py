@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import os
+import random
+import time
+from typing import AsyncGenerator, Dict, List, Optional, Sequence
+
+from redis.exceptions import RedisError
+
+from config.redis import redis_client
+from utils import metrics
+from utils.chunkedStream import chunkedStream
+from .llm_scheduler import llm_scheduler, LLM_BUSY_MESSAGE, PRIORITY_FALLBACK
+
+# ---------- Response pool settings ---------- #
+RESPONSE_POOL_SIZE = int(os.getenv("RESPONSE_POOL_SIZE", "5"))                  # variants kept per prompt
+RESPONSE_POOL_REFRESH = float(os.getenv("RESPONSE_POOL_REFRESH", "21600"))      # seconds between regenerations
+RESPONSE_POOL_PREFIX = "response_pool:"
+
+
+def is_usable_reply(text: str) -> bool:
+    """Generated text worth keeping: not empty, not an LLM error or busy notice."""
+    text = text.strip()
+    return bool(text) and not text.startswith("[Error]") and text != LLM_BUSY_MESSAGE
+
+
+class ResponsePool:
+    """
+    Pre-generated replies for prompts whose text never changes (fallback,
+    human handoff). N variants per prompt are kept in a Redis set shared by
+    all workers; a request streams a random one at once through chunkedStream
+    instead of waiting for a fresh generation. Each pool is seeded with the
+    hand-written paraphrases it was registered with, and the LLM fills the
+    rest, asked to word each new variant differently from the ones it has
+    (identical generations would collapse in the set). With neither pooled
+    variants nor Redis, a request streams a random paraphrase; only a pool
+    without paraphrases falls back to a live generation, which is stored
+    while the rest fills in the background. The refresh loop regenerates
+    every pool periodically, so the wording does not go stale.
+    Keys include a hash of the prompt and paraphrases, so editing either
+    starts a new pool.
+    """
+
+    def __init__(self, size: int = RESPONSE_POOL_SIZE, refresh_interval: float = RESPONSE_POOL_REFRESH):
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.prompts: Dict[str, str] = {}
+        self.paraphrases: Dict[str, List[str]] = {}
+        self.filling: Dict[str, asyncio.Task] = {}
+
+    def register(self, name: str, prompt: str, paraphrases: Sequence[str] = ()):
+        self.prompts[name] = prompt
+        self.paraphrases[name] = list(paraphrases)
+
+    def key(self, name: str) -> str:
+        source = "\n".join([self.prompts[name], *self.paraphrases[name]])
+        prompt_hash = hashlib.sha1(source.encode("utf-8")).hexdigest()[:12]
+        return f"{RESPONSE_POOL_PREFIX}{name}:{prompt_hash}"
+
+    async def stream(self, name: str) -> AsyncGenerator[str, None]:
+        """Tokens of one reply for the named prompt: a pooled variant if there is one, else a live generation."""
+        variant = await self._random_variant(name)
+        if variant is None and self.paraphrases[name]:
+            variant = random.choice(self.paraphrases[name])
+            self.fill_in_background(name)
+        if variant is not None:
+            metrics.increment("response_pool.hit")
+            metrics.increment(f"response_pool.{name}.hit")
+            metrics.increment("response_pool.latency_saved_ms", metrics.average(f"response_pool.generation_ms.{name}"))
+            async for chunk, _ in chunkedStream(variant):
+                yield chunk
+            return
+
+        metrics.increment("response_pool.miss")
+        metrics.increment(f"response_pool.{name}.miss")
+        tokens: List[str] = []
+        start = time.perf_counter()
+        async for token in llm_scheduler.stream(prompt=self.prompts[name], priority=PRIORITY_FALLBACK):
+            tokens.append(token)
+            yield token
+
+        text = "".join(tokens)
+        if is_usable_reply(text):
+            metrics.observe(f"response_pool.generation_ms.{name}", (time.perf_counter() - start) * 1000)
+            await self._add_variants(name, [text])
+        self.fill_in_background(name)
+
+    def fill_in_background(self, name: str):
+        """Top the pool up to size without blocking the caller (one fill per pool at a time)."""
+        task = self.filling.get(name)
+        if task is None or task.done():
+            self.filling[name] = asyncio.create_task(self._fill(name))
+
+    async def refresh_all(self):
+        """Regenerate every pool and swap the new variants in atomically; the paraphrases always stay."""
+        for name in self.prompts:
+            seeds = self.paraphrases[name]
+            generated = await self._generate(name, self.size - len(seeds), seeds)
+            if not generated:
+                continue
+            variants = seeds + generated
+            key = self.key(name)
+            try:
+                async with redis_client.pipeline(transaction=True) as pipe:
+                    pipe.delete(key)
+                    pipe.sadd(key, *variants)
+                    await pipe.execute()
+                print(f"[RESPONSE POOL] Refreshed {name} with {len(variants)} variants")
+            except RedisError as e:
+                print(f"[RESPONSE POOL] Could not store {name} variants: {e}")
+
+    async def run_refresh(self):
+        """
+        Background task started in the FastAPI lifespan.
+        Tops up missing variants at boot, then regenerates every refresh_interval;
+        a Redis lock lets only one worker per interval do the regeneration.
+        """
+        for name in self.prompts:
+            await self._fill(name)
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                if await redis_client.set(f"{RESPONSE_POOL_PREFIX}refresh_lock", "1", nx=True, ex=max(int(self.refresh_interval), 1)):
+                    await self.refresh_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[RESPONSE POOL] Refresh failed: {e}")
+
+    async def close(self):
+        tasks = [task for task in self.filling.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _random_variant(self, name: str) -> Optional[str]:
+        try:
+            return await redis_client.srandmember(self.key(name))
+        except RedisError as e:
+            print(f"[RESPONSE POOL] Redis read failed: {e}")
+            return None
+
+    async def _add_variants(self, name: str, variants: List[str]):
+        try:
+            await redis_client.sadd(self.key(name), *variants)
+        except RedisError as e:
+            print(f"[RESPONSE POOL] Could not store {name} variants: {e}")
+
+    async def _fill(self, name: str):
+        key = self.key(name)
+        try:
+            if self.paraphrases[name]:
+                await redis_client.sadd(key, *self.paraphrases[name])
+            existing = list(await redis_client.smembers(key))
+        except RedisError as e:
+            print(f"[RESPONSE POOL] Redis read failed: {e}")
+            return
+        variants = await self._generate(name, self.size - len(existing), existing)
+        if variants:
+            await self._add_variants(name, variants)
+
+    async def _generate(self, name: str, count: int, existing: Sequence[str] = ()) -> List[str]:
+        variants = []
+        for _ in range(max(count, 0)):
+            start = time.perf_counter()
+            prompt = self._variation_prompt(name, [*existing, *variants])
+            text = "".join([token async for token in llm_scheduler.stream(prompt=prompt, priority=PRIORITY_FALLBACK)])
+            if not is_usable_reply(text):
+                break  # LLM down or busy; try again on the next miss or refresh
+            metrics.observe(f"response_pool.generation_ms.{name}", (time.perf_counter() - start) * 1000)
+            variants.append(text)
+        return variants
+
+    def _variation_prompt(self, name: str, existing: Sequence[str]) -> str:
+        """The registered prompt, plus the replies the new variant must not repeat."""
+        if not existing:
+            return self.prompts[name]
+        replies = "\n".join(f"- {reply.strip()}" for reply in existing)
+        return (f"{self.prompts[name].rstrip()}\n\n"
+                f"Use different wording from these replies, with the same meaning:\n{replies}\n"
+                "Reply with the new text only.")
+
+
+response_pool = ResponsePool()
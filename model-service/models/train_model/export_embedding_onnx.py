@@ -0,0 +1,54 @@
+"""
+Export all-MiniLM-L6-v2 to ONNX and quantize it to int8 for the CPU
+embedding backend (EMBEDDING_BACKEND=onnx).
+
+Run from the model-service directory:
+    python models/train_model/export_embedding_onnx.py
+"""
+import os
+
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from transformers import AutoModel, AutoTokenizer
+
+MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+OUTPUT_DIR = os.getenv("EMBEDDING_ONNX_DIR", "models/load_dict/embedding-onnx")
+FP32_FILE = os.path.join(OUTPUT_DIR, "model.onnx")
+INT8_FILE = os.path.join(OUTPUT_DIR, "model.int8.onnx")
+
+
+def export_onnx():
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    model = AutoModel.from_pretrained(MODEL_NAME)
+    model.config.return_dict = False
+    model.eval()
+
+    sample = tokenizer(["What is the breakfast time?"], return_tensors="pt")
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in ("input_ids", "attention_mask", "token_type_ids")}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+            FP32_FILE,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    # The serving backend only needs the fast tokenizer's tokenizer.json
+    tokenizer.save_pretrained(OUTPUT_DIR)
+    print(f"Exported {MODEL_NAME} to {FP32_FILE}")
+
+
+def quantize():
+    # Dynamic quantization: int8 weights, activations quantized on the fly
+    quantize_dynamic(FP32_FILE, INT8_FILE, weight_type=QuantType.QInt8)
+    print(f"Quantized model saved to {INT8_FILE}")
+
+
+if __name__ == "__main__":
+    export_onnx()
+    quantize()
@@ -1,4 +1,5 @@
 import json
+import sys
 import numpy as np
 import pickle
 import torch
@@ -9,39 +10,41 @@ from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from torch.utils.data import DataLoader, Dataset
-from config.mongoDB import db
-
-
-# Connect to MongoDB
-faq_collection = db["faqs"]
 
 import asyncio
 
+# Re-export the saved model without retraining (no MongoDB needed)
+EXPORT_ONLY = __name__ == "__main__" and "--export-only" in sys.argv
+
 async def load_data():
+    # Connect to MongoDB
+    from config.mongoDB import db
+    faq_collection = db["faqs"]
     cursor = faq_collection.find({"intent": {"$exists": True}})
     data = await cursor.to_list(length=None)
     return data
 
 
-# Load data from MongoDB
-data = asyncio.run(load_data())
-texts = [item["question"] for item in data]
-labels = [item["intent"] for item in data]
-
 # device agnostic code
 device = "cuda" if torch.cuda.is_available() else "cpu"
 print(f"Using device: {device}")
 
-# 2. Text to vector
-vectorizer = CountVectorizer()
-X = vectorizer.fit_transform(texts)
+if not EXPORT_ONLY:
+    # Load data from MongoDB
+    data = asyncio.run(load_data())
+    texts = [item["question"] for item in data]
+    labels = [item["intent"] for item in data]
+
+    # 2. Text to vector
+    vectorizer = CountVectorizer()
+    X = vectorizer.fit_transform(texts)
 
-# 3. Encode labels
-labels_encoder = LabelEncoder()
-y = labels_encoder.fit_transform(labels)
+    # 3. Encode labels
+    labels_encoder = LabelEncoder()
+    y = labels_encoder.fit_transform(labels)
 
-# 4. Split the dataset
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    # 4. Split the dataset
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
 class IntentDataset(Dataset):
     def __init__(self, X, y) -> None:
@@ -83,13 +86,40 @@ def predict_intent(text: str) -> str:
         prediction_index = output.argmax(dim=1).item()
         return labels_encoder.inverse_transform([prediction_index])[0]
 
+def export_npz(model: nn.Module, path: str):
+    """Write the Linear layers as float32 arrays for the torch-free backend (INTENT_BACKEND=numpy)."""
+    state = model.state_dict()
+    np.savez_compressed(path, **{
+        f"{kind}{layer}": state[f"net.{layer}.{kind}"].cpu().numpy().astype(np.float32)
+        for layer in ("0", "2", "4")
+        for kind in ("weight", "bias")
+    })
+    print(f"Exported weights to {path}")
+
 def accuracy(predictions: torch.Tensor, labels: torch.Tensor) -> float:
     correct = (predictions == labels).sum().item()
     total = labels.size(0)
     return correct / total
 
 
-if __name__ == "__main__":
+WEIGHTS_PATH = "models/load_dict/intent-classifier/intent_classifier.pth"
+NPZ_PATH = "models/load_dict/intent-classifier/intent_classifier.npz"
+VECTORIZER_PATH = "models/load_dict/intent-classifier/vectorizer.pkl"
+LABEL_ENCODER_PATH = "models/load_dict/intent-classifier/label_encoder.pkl"
+
+if EXPORT_ONLY:
+    # Layer sizes come from the saved vectorizer and label encoder
+    with open(VECTORIZER_PATH, "rb") as f:
+        vectorizer = pickle.load(f)
+    with open(LABEL_ENCODER_PATH, "rb") as f:
+        labels_encoder = pickle.load(f)
+    model = IntentClassifier(input_shape=len(vectorizer.get_feature_names_out()),
+                            output_shape=len(labels_encoder.classes_),
+                            hidden_units=128)
+    model.load_state_dict(torch.load(WEIGHTS_PATH, map_location="cpu"))
+    export_npz(model, NPZ_PATH)
+
+elif __name__ == "__main__":
 
     train_dataset = IntentDataset(X_train, y_train)
     test_dataset = IntentDataset(X_test, y_test)
@@ -167,10 +197,11 @@ if __name__ == "__main__":
         print(f"{sample} → Intent: {intent}")
 
     
-    torch.save(model.state_dict(), "models/load_dict/intent-classifier/intent_classifier.pth")
-    with open("models/load_dict/intent-classifier/vectorizer.pkl", "wb") as f:
+    torch.save(model.state_dict(), WEIGHTS_PATH)
+    export_npz(model, NPZ_PATH)
+    with open(VECTORIZER_PATH, "wb") as f:
         pickle.dump(vectorizer, f)
-    with open("models/load_dict/intent-classifier/label_encoder.pkl", "wb") as f:
+    with open(LABEL_ENCODER_PATH, "wb") as f:
         pickle.dump(labels_encoder, f)
 
     print("Model, vectorizer, and label encoder saved.")
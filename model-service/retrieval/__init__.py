@@ -1,10 +1,10 @@
-from .faq_search import find_best_faq, load_faqs_from_mongodb
-from models import stream_llm, predict_intent
-from .embedding import get_embedding
+from .faq_search import find_best_faq, search_faqs, load_faqs_from_mongodb
+from .embedding import get_embedding, embedding_engine
 
 __all__ = [
     "find_best_faq",
+    "search_faqs",
     "load_faqs_from_mongodb",
     "get_embedding",
-    "stream_llm",
+    "embedding_engine",
 ]
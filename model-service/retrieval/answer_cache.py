@@ -0,0 +1,123 @@
+import base64
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+from redis.exceptions import RedisError
+
+from config.redis import redis_client
+from utils import metrics
+from utils.turn_features import TurnFeatures
+from .embedding import EMBEDDING_VERSION
+from .faq_index import answer_hash
+
+# ---------- FAQ answer cache settings ---------- #
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.9"))     # cosine to the cached question
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "86400"))                 # seconds per entry
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "10000"))  # LRU bound across all FAQs
+ANSWER_CACHE_LSH_BITS = int(os.getenv("ANSWER_CACHE_LSH_BITS", "12"))          # random hyperplanes per bucket
+ANSWER_CACHE_LSH_SEED = 1234  # every worker must draw the same hyperplanes
+ANSWER_CACHE_PREFIX = f"answer_cache:{EMBEDDING_VERSION}:"
+ANSWER_CACHE_LRU_KEY = ANSWER_CACHE_PREFIX + "lru"
+
+
+class AnswerCache:
+    """
+    Redis cache of LLM replies to FAQ-grounded questions.
+    The key combines the matched FAQ id, a hash of its answer text and a
+    random-hyperplane LSH bucket of the query embedding, so near-identical
+    questions about the same FAQ share an entry and editing the answer
+    orphans the old entries (they age out through their TTL).
+    A hit also has to be within `threshold` cosine of the question the
+    reply was generated for. A sorted set of last-use times keeps the cache
+    to `max_entries`, evicting the least recently used.
+    """
+
+    def __init__(
+        self,
+        threshold: float = ANSWER_CACHE_THRESHOLD,
+        ttl: int = ANSWER_CACHE_TTL,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        lsh_bits: int = ANSWER_CACHE_LSH_BITS,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lsh_bits = lsh_bits
+        self._hyperplanes: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def bucket(self, vector: np.ndarray) -> str:
+        if self._hyperplanes is None:
+            with self._lock:
+                if self._hyperplanes is None:
+                    rng = np.random.default_rng(ANSWER_CACHE_LSH_SEED)
+                    self._hyperplanes = rng.standard_normal((self.lsh_bits, vector.shape[0])).astype(np.float32)
+        # One bit per hyperplane: which side of it the query falls on
+        bits = (self._hyperplanes @ vector > 0).astype(np.int64)
+        return format(int(bits @ (1 << np.arange(self.lsh_bits, dtype=np.int64))), "x")
+
+    def key(self, faq: Dict[str, str], vector: np.ndarray) -> str:
+        return f"{ANSWER_CACHE_PREFIX}{faq['id']}:{answer_hash(faq['answer'])}:{self.bucket(vector)}"
+
+    async def get(self, query: str, faq: Dict[str, str], features: Optional[TurnFeatures] = None) -> Optional[str]:
+        if not ANSWER_CACHE_ENABLED or "id" not in faq:
+            return None
+        vector = await (features or TurnFeatures(query)).embedding()
+        key = self.key(faq, vector)
+        try:
+            raw = await redis_client.get(key)
+        except RedisError as e:
+            print(f"[ANSWER CACHE] Redis read failed: {e}")
+            return None
+
+        if raw:
+            entry = json.loads(raw)
+            cached_vector = np.frombuffer(base64.b64decode(entry["vector"]), dtype=np.float32)
+            similarity = float(np.dot(vector, cached_vector))
+            metrics.observe("answer_cache.similarity", similarity)
+            if similarity >= self.threshold:
+                metrics.increment("answer_cache.hit")
+                await self._touch(key)
+                return entry["reply"]
+            metrics.increment("answer_cache.below_threshold")
+        metrics.increment("answer_cache.miss")
+        return None
+
+    async def set(self, query: str, faq: Dict[str, str], reply: str, features: Optional[TurnFeatures] = None):
+        if not ANSWER_CACHE_ENABLED or "id" not in faq:
+            return
+        vector = await (features or TurnFeatures(query)).embedding()
+        key = self.key(faq, vector)
+        entry = json.dumps({
+            "reply": reply,
+            "vector": base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii"),
+        })
+        now = time.time()
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.set(key, entry, ex=self.ttl)
+                pipe.zadd(ANSWER_CACHE_LRU_KEY, {key: now})
+                pipe.zremrangebyscore(ANSWER_CACHE_LRU_KEY, 0, now - self.ttl)  # entries already expired
+                pipe.zcard(ANSWER_CACHE_LRU_KEY)
+                *_, size = await pipe.execute()
+            if size > self.max_entries:
+                evicted = await redis_client.zpopmin(ANSWER_CACHE_LRU_KEY, size - self.max_entries)
+                if evicted:
+                    await redis_client.delete(*[evicted_key for evicted_key, _ in evicted])
+                    metrics.increment("answer_cache.evicted", len(evicted))
+        except RedisError as e:
+            print(f"[ANSWER CACHE] Redis write failed: {e}")
+
+    async def _touch(self, key: str):
+        try:
+            await redis_client.zadd(ANSWER_CACHE_LRU_KEY, {key: time.time()}, xx=True)
+        except RedisError as e:
+            print(f"[ANSWER CACHE] Redis write failed: {e}")
+
+
+answer_cache = AnswerCache()
@@ -1,13 +1,94 @@
-from sentence_transformers import SentenceTransformer
-from models import stream_llm
+import os
+import threading
+from typing import List, Sequence
 
-# Load the Sentence Transformer model once
-model = SentenceTransformer('all-MiniLM-L6-v2')
+import numpy as np
 
-def get_embedding(text):
+# ---------- Shared sentence embedding model ---------- #
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# "torch" (sentence-transformers) or "onnx" (int8 ONNX Runtime export, CPU only)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", "models/load_dict/embedding-onnx")
+# Tag stored next to every persisted vector (index manifest, caches); the backends
+# rank identically within tolerance but are not bit-identical.
+EMBEDDING_VERSION = f"{EMBEDDING_MODEL_NAME}@{EMBEDDING_BACKEND}"
+
+
+class SentenceTransformerBackend:
+    """PyTorch backend through sentence-transformers."""
+
+    def __init__(self, model_name: str, batch_size: int):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        self.batch_size = batch_size
+        self.dimension = int(self.model.get_sentence_embedding_dimension())
+
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+
+
+def load_backend(backend: str, model_name: str, batch_size: int):
+    if backend == "onnx":
+        from .onnx_embedding import OnnxEmbeddingBackend
+        return OnnxEmbeddingBackend(EMBEDDING_ONNX_DIR, batch_size)
+    if backend == "torch":
+        return SentenceTransformerBackend(model_name, batch_size)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+
+
+class EmbeddingEngine:
     """
-        Generating a sentences embedding for the given text
+    Process-wide MiniLM encoder.
+    The weights are loaded once, on first use, and every module (FAQ search,
+    cosine scoring, ingest script) shares the same instance.
+    Output vectors are always L2-normalized float32.
     """
-    return model.encode(text).tolist()
 
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, batch_size: int = EMBEDDING_BATCH_SIZE, backend: str = EMBEDDING_BACKEND):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.backend_name = backend
+        self._backend = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    print(f"[EMBEDDING] Loading {self.model_name} ({self.backend_name}) …")
+                    self._backend = load_backend(self.backend_name, self.model_name, self.batch_size)
+        return self._backend
 
+    @property
+    def dimension(self) -> int:
+        return self.backend.dimension
+
+    def encode(self, text: str) -> np.ndarray:
+        """Encode a single string into a (dim,) normalized float32 vector."""
+        return self.encode_batch([text])[0]
+
+    def encode_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Encode a list of strings into a (n, dim) normalized float32 matrix."""
+        if len(texts) == 0:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        vectors = self.backend.encode_batch(list(texts))
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+# Load the Sentence Transformer model once per process
+embedding_engine = EmbeddingEngine()
+
+
+def get_embedding(text):
+    """
+        Generating a sentences embedding for the given text
+    """
+    return embedding_engine.encode(text).tolist()
@@ -0,0 +1,86 @@
+import asyncio
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from utils import metrics
+from .embedding import EmbeddingEngine, embedding_engine
+
+# ---------- Micro-batching settings ---------- #
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+
+
+class EmbeddingBatcher:
+    """
+    Collects concurrent encode requests for up to max_wait_ms (or until
+    max_batch_size requests are waiting) and runs them as one batched encode
+    in a worker thread, resolving each caller's future with its own row.
+    A single worker runs one batch at a time, so requests that arrive while
+    a batch is encoding are grouped into the next one.
+    """
+
+    def __init__(self, engine: EmbeddingEngine = embedding_engine, max_wait_ms: float = EMBED_BATCH_MAX_WAIT_MS, max_batch_size: int = EMBED_BATCH_MAX_SIZE):
+        self.engine = engine
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def encode(self, text: str) -> np.ndarray:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Callers that were cancelled while waiting do not need a vector
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            metrics.observe("embedding_batcher.batch_size", len(batch))
+            try:
+                vectors = await asyncio.to_thread(self.engine.encode_batch, [text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+
+embedding_batcher = EmbeddingBatcher()
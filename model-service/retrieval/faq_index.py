@@ -0,0 +1,442 @@
+import hashlib
+import json
+import math
+import os
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from utils.text_normalizer import normalize_text
+from .embedding import EMBEDDING_VERSION
+
+INDEX_FILE = "faq.index"
+METADATA_FILE = "faq_meta.json"
+PARTITIONS_DIR = "partitions"
+
+# Memory-map the flat vector codes instead of copying them into RAM (falls back
+# to the generic mmap flag on FAISS builds without IndexFlatCodes mmap support).
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+# ---------- ANN index settings ---------- #
+# "flat" (exact), "ivfpq" (inverted lists + product quantization) or "hnsw" (graph)
+FAQ_INDEX_TYPE = os.getenv("FAQ_INDEX_TYPE", "flat")
+FAQ_INDEX_PCA_DIM = int(os.getenv("FAQ_INDEX_PCA_DIM", "0"))          # 0 keeps the full embedding dimension
+FAQ_IVF_NLIST = int(os.getenv("FAQ_IVF_NLIST", "0"))                  # 0 picks ~4 * sqrt(corpus size)
+FAQ_IVF_NPROBE = int(os.getenv("FAQ_IVF_NPROBE", "16"))
+FAQ_PQ_M = int(os.getenv("FAQ_PQ_M", "16"))                           # sub-quantizers, must divide the dimension
+FAQ_PQ_NBITS = int(os.getenv("FAQ_PQ_NBITS", "8"))
+# Re-rank IVF-PQ candidates against exact stored vectors, so scores are true cosines
+FAQ_IVF_REFINE = os.getenv("FAQ_IVF_REFINE", "true").lower() == "true"
+FAQ_IVF_REFINE_K_FACTOR = int(os.getenv("FAQ_IVF_REFINE_K_FACTOR", "64"))   # PQ candidates per requested hit
+FAQ_HNSW_M = int(os.getenv("FAQ_HNSW_M", "32"))
+FAQ_HNSW_EF_CONSTRUCTION = int(os.getenv("FAQ_HNSW_EF_CONSTRUCTION", "80"))
+FAQ_HNSW_EF_SEARCH = int(os.getenv("FAQ_HNSW_EF_SEARCH", "64"))
+# Also keep one sub-index per FAQ "intent" field, searched when the query's intent is confident
+FAQ_INTENT_PARTITIONS = os.getenv("FAQ_INTENT_PARTITIONS", "true").lower() == "true"
+
+# Training points per centroid FAISS asks for; smaller corpora fall back to the flat index
+MIN_POINTS_PER_CENTROID = 39
+# Share of deleted-but-still-indexed HNSW entries after which a rebuild is worthwhile
+TOMBSTONE_REBUILD_RATIO = 0.2
+
+
+@dataclass
+class IndexConfig:
+    index_type: str = FAQ_INDEX_TYPE
+    pca_dim: int = FAQ_INDEX_PCA_DIM
+    nlist: int = FAQ_IVF_NLIST
+    nprobe: int = FAQ_IVF_NPROBE
+    pq_m: int = FAQ_PQ_M
+    pq_nbits: int = FAQ_PQ_NBITS
+    ivf_refine: bool = FAQ_IVF_REFINE
+    refine_k_factor: int = FAQ_IVF_REFINE_K_FACTOR
+    hnsw_m: int = FAQ_HNSW_M
+    ef_construction: int = FAQ_HNSW_EF_CONSTRUCTION
+    ef_search: int = FAQ_HNSW_EF_SEARCH
+    intent_partitions: bool = FAQ_INTENT_PARTITIONS
+
+    def build_params(self) -> Dict[str, Any]:
+        """Parameters baked into the index on disk; nprobe, efSearch and the refine k_factor can change without a rebuild."""
+        params = asdict(self)
+        del params["nprobe"], params["ef_search"], params["refine_k_factor"]
+        return params
+
+
+def index_factory_string(config: IndexConfig, dimension: int, corpus_size: int) -> str:
+    """
+    FAISS factory string for the configured index type.
+    Flat and HNSW are wrapped in IDMap2 so FAQ ids survive. IVF-PQ with
+    refinement is wrapped the same way; its RFlat stage keeps the exact
+    vectors, re-scores the PQ candidates and serves reconstruct. Unrefined
+    IVF-PQ keeps its own ids, with a hash-table direct map added after training.
+    """
+    if config.index_type not in ("flat", "ivfpq", "hnsw"):
+        raise ValueError(f"Unknown FAQ_INDEX_TYPE: {config.index_type}")
+    if config.index_type == "flat":
+        return "IDMap2,Flat"
+
+    prefix = f"PCA{config.pca_dim},L2norm," if 0 < config.pca_dim < dimension else ""
+    if config.index_type == "hnsw":
+        return f"IDMap2,{prefix}HNSW{config.hnsw_m},Flat"
+    ivfpq = f"{prefix}IVF{ivf_nlist(config, corpus_size)},PQ{config.pq_m}x{config.pq_nbits}"
+    return f"IDMap2,{ivfpq},RFlat" if config.ivf_refine else ivfpq
+
+
+def ivf_nlist(config: IndexConfig, corpus_size: int) -> int:
+    if config.nlist > 0:
+        return config.nlist
+    # Capped so every centroid still gets enough training points
+    return max(1, min(int(4 * math.sqrt(corpus_size)), corpus_size // MIN_POINTS_PER_CENTROID))
+
+
+def min_training_size(config: IndexConfig, dimension: int, corpus_size: int) -> int:
+    """Vectors needed to train the configured index; 0 when it needs no training."""
+    needed = 0
+    if 0 < config.pca_dim < dimension:
+        needed = dimension
+    if config.index_type == "ivfpq":
+        needed = max(needed, MIN_POINTS_PER_CENTROID * max(ivf_nlist(config, corpus_size), 2 ** config.pq_nbits))
+    return needed
+
+
+def create_index(config: IndexConfig, dimension: int, training_vectors: Optional[np.ndarray] = None) -> Tuple[faiss.Index, IndexConfig]:
+    """
+    Build an empty, trained inner-product index for the config.
+    Falls back to the exact flat index when there are too few vectors to train on,
+    which is also the fastest choice for small corpora. Returns the index and
+    the config it was actually built with.
+    """
+    if config.index_type == "flat" and config.pca_dim:
+        print(f"[FAISS] FAQ_INDEX_PCA_DIM={config.pca_dim} is ignored by the flat index (only hnsw and ivfpq use PCA).")
+        config = replace(config, pca_dim=0)
+    corpus_size = 0 if training_vectors is None else len(training_vectors)
+    needed = min_training_size(config, dimension, corpus_size)
+    if needed and corpus_size < needed:
+        print(f"[FAISS] {config.index_type} needs {needed} training vectors, have {corpus_size}; using a flat index.")
+        config = replace(config, index_type="flat", pca_dim=0)
+
+    spec = index_factory_string(config, dimension, corpus_size)
+    index = faiss.index_factory(dimension, spec, faiss.METRIC_INNER_PRODUCT)
+    if config.index_type == "hnsw":
+        hnsw = faiss.downcast_index(faiss.downcast_index(index).index)
+        if isinstance(hnsw, faiss.IndexPreTransform):
+            hnsw = faiss.downcast_index(hnsw.index)
+        hnsw.hnsw.efConstruction = config.ef_construction
+    if not index.is_trained:
+        index.train(training_vectors)
+    if config.index_type == "ivfpq" and not config.ivf_refine:
+        # Lets remove_ids and reconstruct work with arbitrary FAQ ids
+        faiss.extract_index_ivf(index).set_direct_map_type(faiss.DirectMap.Hashtable)
+    print(f"[FAISS] Created {spec} index ({dimension} dims).")
+    return index, config
+
+
+def apply_search_params(index: faiss.Index, config: IndexConfig):
+    """Set the query-time knobs that apply to this index (nprobe for IVF, efSearch for HNSW, k_factor for refinement)."""
+    params = faiss.ParameterSpace()
+    for name, value in (("nprobe", config.nprobe), ("efSearch", config.ef_search)):
+        try:
+            params.set_index_parameter(index, name, value)
+        except RuntimeError:
+            pass  # not this kind of index
+    if isinstance(index, faiss.IndexIDMap2):
+        inner = faiss.downcast_index(index.index)
+        if isinstance(inner, faiss.IndexRefine):
+            inner.k_factor = config.refine_k_factor
+
+
+def faq_from_doc(doc: Dict) -> Dict:
+    """Fields of a MongoDB FAQ document kept in the index metadata."""
+    faq = {"id": str(doc["_id"]), "question": doc["question"], "answer": doc["answer"]}
+    if doc.get("paraphrases"):
+        faq["paraphrases"] = list(doc["paraphrases"])
+    if doc.get("intent"):
+        faq["intent"] = doc["intent"]
+    # A pre-generated reply is only kept while it still matches the answer text
+    if doc.get("reply") and doc.get("reply_answer_hash") == answer_hash(doc["answer"]):
+        faq["reply"] = doc["reply"]
+    return faq
+
+
+def group_by_intent(faqs: List[Dict]) -> Dict[str, List[int]]:
+    """Positions of the FAQs carrying each intent; FAQs without one belong to no partition."""
+    groups: Dict[str, List[int]] = {}
+    for position, faq in enumerate(faqs):
+        if faq.get("intent"):
+            groups.setdefault(faq["intent"], []).append(position)
+    return groups
+
+
+def partition_dir(intent: str) -> str:
+    return hashlib.sha1(intent.encode("utf-8")).hexdigest()[:12]
+
+
+def question_hash(question: str) -> str:
+    return hashlib.sha1(question.encode("utf-8")).hexdigest()[:16]
+
+
+def answer_hash(answer: str) -> str:
+    return hashlib.sha1(answer.encode("utf-8")).hexdigest()[:12]
+
+
+def question_embedding_fields(question: str, vector: np.ndarray) -> Dict:
+    """
+    Fields persisted on a FAQ document next to its question vector.
+    The version tag and question hash let index builds reuse the stored vector
+    only when it came from the current embedding model and the current question text.
+    """
+    return {
+        "question_embedding": np.asarray(vector, dtype=np.float32).tolist(),
+        "question_embedding_version": EMBEDDING_VERSION,
+        "question_embedding_hash": question_hash(question),
+    }
+
+
+def stored_question_vector(doc: Dict) -> Optional[np.ndarray]:
+    """The stored question vector of a FAQ document, or None when it is missing or stale."""
+    vector = doc.get("question_embedding")
+    if not vector:
+        return None
+    if doc.get("question_embedding_version") != EMBEDDING_VERSION:
+        return None
+    if doc.get("question_embedding_hash") != question_hash(doc["question"]):
+        return None
+    return np.asarray(vector, dtype=np.float32)
+
+
+@dataclass
+class FaqHit:
+    score: float          # cosine similarity (inner product of normalized vectors)
+    faq: Dict[str, str]   # {"id", "question", "answer", optional "paraphrases"}
+    vector: Optional[np.ndarray]  # question vector read back from the index; None when it cannot be
+                                  # (PCA-projected), approximate for unrefined IVF-PQ
+
+
+class FaqIndex:
+    """
+    FAISS inner-product index over L2-normalized question vectors.
+    Because every vector is unit length, the search score is already the
+    cosine similarity, so no re-embedding is needed to score a match
+    (approximately so for unrefined IVF-PQ codes and PCA projections; the
+    default IVF-PQ refine stage re-scores its candidates exactly).
+    The index type (flat, IVF-PQ, HNSW, optional PCA) comes from IndexConfig.
+    With intent_partitions, every FAQ is also added to a smaller sub-index
+    for its "intent" field, kept in sync by add/remove and saved alongside.
+    """
+
+    def __init__(self, dimension: int, index: Optional[faiss.Index] = None, config: Optional[IndexConfig] = None):
+        self.dimension = dimension
+        if index is None:
+            # Nothing to train on yet (e.g. the first FAQ arriving through the change stream)
+            index, config = create_index(replace(config or IndexConfig(), index_type="flat"), dimension)
+        self.config = config or IndexConfig()
+        self.index = index
+        apply_search_params(self.index, self.config)
+        self.metadata: Dict[int, Dict[str, str]] = {}
+        self.ids_by_doc: Dict[str, int] = {}   # MongoDB _id -> FAISS id
+        self.exact: Dict[str, int] = {}        # normalized question / paraphrase -> FAISS id
+        self.tombstones = set()                # ids removed from metadata but still in the index (HNSW, refined IVF-PQ)
+        self.partitions: Dict[str, "FaqIndex"] = {}  # FAQ intent -> sub-index
+        self.next_id = 0
+        self.read_only = False
+
+    def __len__(self) -> int:
+        return len(self.metadata)
+
+    @classmethod
+    def build(cls, faqs: List[Dict[str, str]], vectors: np.ndarray, config: Optional[IndexConfig] = None) -> "FaqIndex":
+        config = config or IndexConfig()
+        training = np.array(vectors, dtype=np.float32, order="C", copy=True)
+        faiss.normalize_L2(training)
+        index, built_config = create_index(config, vectors.shape[1], training)
+        faq_index = cls(vectors.shape[1], index=index, config=built_config)
+        if config.intent_partitions:
+            # Each partition gets the requested index type, or flat if it is too small to train
+            partition_config = replace(config, intent_partitions=False)
+            for intent, positions in group_by_intent(faqs).items():
+                faq_index.partitions[intent] = cls.build([faqs[i] for i in positions], vectors[positions], partition_config)
+        faq_index._add(faqs, vectors)
+        return faq_index
+
+    @property
+    def needs_rebuild(self) -> bool:
+        """True once tombstones make up enough of the index to waste search effort."""
+        if any(partition.needs_rebuild for partition in self.partitions.values()):
+            return True
+        return len(self.tombstones) > TOMBSTONE_REBUILD_RATIO * max(self.index.ntotal, 1)
+
+    def partition(self, intent: Optional[str]) -> Optional["FaqIndex"]:
+        return self.partitions.get(intent) if intent else None
+
+    def add(self, faqs: List[Dict[str, str]], vectors: np.ndarray) -> List[int]:
+        ids = self._add(faqs, vectors)
+        if self.config.intent_partitions:
+            for intent, positions in group_by_intent(faqs).items():
+                partition = self.partitions.get(intent)
+                if partition is None:
+                    partition = self.partitions[intent] = FaqIndex(self.dimension, config=replace(self.config, intent_partitions=False))
+                partition.add([faqs[i] for i in positions], np.asarray(vectors)[positions])
+        return ids
+
+    def _add(self, faqs: List[Dict[str, str]], vectors: np.ndarray) -> List[int]:
+        self._ensure_writable()
+        vectors = np.array(vectors, dtype=np.float32, order="C", copy=True)
+        faiss.normalize_L2(vectors)
+        ids = np.arange(self.next_id, self.next_id + len(faqs), dtype=np.int64)
+        self.index.add_with_ids(vectors, ids)
+        for faq_id, faq in zip(ids.tolist(), faqs):
+            self._register(faq_id, faq)
+        self.next_id += len(faqs)
+        return ids.tolist()
+
+    def upsert(self, faq: Dict[str, str], vector: np.ndarray) -> int:
+        """Insert or replace a single FAQ in place, keyed by its MongoDB _id."""
+        self.remove(faq["id"])
+        return self.add([faq], np.asarray(vector, dtype=np.float32).reshape(1, -1))[0]
+
+    def update_in_place(self, faq: Dict[str, str]) -> bool:
+        """
+        Replace the metadata of an indexed FAQ whose question is unchanged
+        (after normalization), keeping its vector, so answer and reply edits
+        leave no tombstone. False when the vector has to be re-added instead:
+        a new FAQ, an edited question or a move to another intent partition.
+        """
+        faq_id = self.ids_by_doc.get(faq["id"])
+        if faq_id is None:
+            return False
+        old = self.metadata[faq_id]
+        if normalize_text(old["question"]) != normalize_text(faq["question"]) or old.get("intent") != faq.get("intent"):
+            return False
+        partition = self.partition(faq.get("intent"))
+        if partition is not None and not partition.update_in_place(faq):
+            return False
+        for key in self._exact_keys(old):
+            if self.exact.get(key) == faq_id:
+                del self.exact[key]
+        self._register(faq_id, faq)
+        return True
+
+    def remove(self, doc_id: str) -> bool:
+        faq_id = self.ids_by_doc.pop(doc_id, None)
+        if faq_id is None:
+            return False
+        self._ensure_writable()
+        try:
+            self.index.remove_ids(np.array([faq_id], dtype=np.int64))
+        except RuntimeError:
+            # HNSW graphs and refined IVF-PQ cannot drop vectors; hide the entry until the next rebuild
+            self.tombstones.add(faq_id)
+        faq = self.metadata.pop(faq_id)
+        for key in self._exact_keys(faq):
+            if self.exact.get(key) == faq_id:
+                del self.exact[key]
+        partition = self.partition(faq.get("intent"))
+        if partition is not None:
+            partition.remove(doc_id)
+        return True
+
+    def match_exact(self, query: str, normalized: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """FAQ whose question or paraphrase equals the query after case/punctuation/whitespace folding."""
+        faq_id = self.exact.get(normalize_text(query) if normalized is None else normalized)
+        return self.metadata[faq_id] if faq_id is not None else None
+
+    def _register(self, faq_id: int, faq: Dict[str, str]):
+        self.metadata[faq_id] = faq
+        self.ids_by_doc[faq["id"]] = faq_id
+        for key in self._exact_keys(faq):
+            self.exact[key] = faq_id
+
+    @staticmethod
+    def _exact_keys(faq: Dict) -> List[str]:
+        keys = [normalize_text(text) for text in [faq["question"], *faq.get("paraphrases", [])]]
+        return [key for key in keys if key]
+
+    def _ensure_writable(self):
+        # A memory-mapped index is read-only; copy it into RAM before the first in-place edit.
+        # clone_index would keep pointing at the mapped codes, so round-trip through serialization.
+        if self.read_only:
+            self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+            self.read_only = False
+
+    def search(self, query_vector: np.ndarray, k: int = 1) -> List[FaqHit]:
+        if len(self) == 0:
+            return []
+        query = np.array(query_vector, dtype=np.float32, order="C", copy=True).reshape(1, -1)
+        faiss.normalize_L2(query)
+        # Over-fetch by the number of tombstones so k live hits can still come back
+        scores, ids = self.index.search(query, min(k + len(self.tombstones), self.index.ntotal))
+
+        hits = []
+        for score, faq_id in zip(scores[0].tolist(), ids[0].tolist()):
+            if faq_id < 0 or faq_id not in self.metadata:
+                continue
+            hits.append(FaqHit(score=float(score), faq=self.metadata[faq_id], vector=self._reconstruct(faq_id)))
+            if len(hits) == k:
+                break
+        return hits
+
+    def _reconstruct(self, faq_id: int) -> Optional[np.ndarray]:
+        # A PCA projection followed by L2 normalization cannot be inverted; the refine stage keeps the original vectors
+        if 0 < self.config.pca_dim < self.dimension and not (self.config.index_type == "ivfpq" and self.config.ivf_refine):
+            return None
+        try:
+            return self.index.reconstruct(faq_id)
+        except RuntimeError:
+            return None
+
+    def save(self, path: str):
+        # Write to temporary files and swap them in, so a memory-mapped copy of
+        # the previous index is never overwritten underneath a reader.
+        os.makedirs(path, exist_ok=True)
+        for intent, partition in self.partitions.items():
+            partition.save(os.path.join(path, PARTITIONS_DIR, partition_dir(intent)))
+        index_file = os.path.join(path, INDEX_FILE)
+        faiss.write_index(self.index, index_file + ".tmp")
+        os.replace(index_file + ".tmp", index_file)
+
+        metadata_file = os.path.join(path, METADATA_FILE)
+        with open(metadata_file + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "dimension": self.dimension,
+                "next_id": self.next_id,
+                "config": asdict(self.config),
+                "tombstones": sorted(self.tombstones),
+                "partitions": {intent: partition_dir(intent) for intent in self.partitions},
+                "faqs": {str(faq_id): faq for faq_id, faq in self.metadata.items()},
+            }, f, ensure_ascii=False)
+        os.replace(metadata_file + ".tmp", metadata_file)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = False, config: Optional[IndexConfig] = None) -> "FaqIndex":
+        index_file = os.path.join(path, INDEX_FILE)
+        index = None
+        index_file_mapped = False
+        if mmap:
+            try:
+                index = faiss.read_index(index_file, MMAP_FLAGS)
+                index_file_mapped = True
+            except RuntimeError as e:
+                print(f"[FAISS] mmap load not supported, reading into memory: {e}")
+        if index is None:
+            index = faiss.read_index(index_file)
+        with open(os.path.join(path, METADATA_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        # Build-time settings come from disk; query-time ones (nprobe, efSearch) from the current config
+        # Indexes saved before partitioning existed have none
+        saved = IndexConfig(**{"intent_partitions": False, "ivf_refine": False, **meta.get("config", {"index_type": "flat"})})
+        if saved.index_type == "flat":
+            saved.pca_dim = 0
+        if config is not None:
+            saved.nprobe, saved.ef_search, saved.refine_k_factor = config.nprobe, config.ef_search, config.refine_k_factor
+        faq_index = cls(meta["dimension"], index=index, config=saved)
+        for faq_id, faq in meta["faqs"].items():
+            faq_index._register(int(faq_id), faq)
+        faq_index.tombstones = set(meta.get("tombstones", []))
+        for intent, directory in meta.get("partitions", {}).items():
+            faq_index.partitions[intent] = cls.load(os.path.join(path, PARTITIONS_DIR, directory), mmap=mmap, config=config)
+        faq_index.next_id = meta["next_id"]
+        faq_index.read_only = index_file_mapped
+        return faq_index
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+from pymongo.errors import PyMongoError
+
+from .embedding import EMBEDDING_VERSION
+from .faq_index import IndexConfig
+
+MANIFEST_FILE = "manifest.json"
+RESUME_TOKEN_FILE = "resume_token.json"
+
+
+async def compute_faq_fingerprint(collection) -> Dict[str, Any]:
+    """
+    Cheap fingerprint of the FAQ corpus.
+    Mongoose stamps every FAQ with updatedAt, so count + max(updatedAt) is
+    enough to notice inserts, edits and deletes without reading the documents.
+    Documents seeded without timestamps (script.py) force a content hash of
+    the indexed fields instead. The index build settings are included, so
+    switching FAQ_INDEX_TYPE (or its training parameters) triggers a rebuild.
+    """
+    stats = await collection.aggregate([
+        {"$group": {
+            "_id": None,
+            "count": {"$sum": 1},
+            "maxUpdatedAt": {"$max": "$updatedAt"},
+            # Pre-generated replies are written without touching updatedAt
+            "maxReplyAt": {"$max": "$reply_generated_at"},
+            "missingUpdatedAt": {"$sum": {"$cond": [{"$ifNull": ["$updatedAt", False]}, 0, 1]}},
+        }}
+    ]).to_list(length=1)
+    stats = stats[0] if stats else {"count": 0, "maxUpdatedAt": None, "maxReplyAt": None, "missingUpdatedAt": 0}
+
+    content_hash = None
+    if stats["missingUpdatedAt"]:
+        hasher = hashlib.sha1()
+        async for doc in collection.find({}, {"question": 1, "answer": 1, "paraphrases": 1, "reply": 1, "intent": 1}).sort("_id", 1):
+            hasher.update(f"{doc['_id']}\x1f{doc.get('question', '')}\x1f{doc.get('answer', '')}\x1f{doc.get('paraphrases', [])}\x1f{doc.get('reply', '')}\x1f{doc.get('intent', '')}\x1e".encode("utf-8"))
+        content_hash = hasher.hexdigest()
+
+    max_updated_at = stats["maxUpdatedAt"]
+    max_reply_at = stats.get("maxReplyAt")
+    return {
+        "count": stats["count"],
+        "maxUpdatedAt": max_updated_at.isoformat() if max_updated_at else None,
+        "maxReplyAt": max_reply_at.isoformat() if max_reply_at else None,
+        "contentHash": content_hash,
+        "embeddingVersion": EMBEDDING_VERSION,
+        "indexConfig": IndexConfig().build_params(),
+    }
+
+
+def read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def write_manifest(path: str, fingerprint: Dict[str, Any]):
+    """Written last and atomically, so a half-saved index never matches the fingerprint."""
+    os.makedirs(path, exist_ok=True)
+    tmp_path = os.path.join(path, MANIFEST_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": fingerprint}, f)
+    os.replace(tmp_path, os.path.join(path, MANIFEST_FILE))
+
+
+def read_resume_token(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(path, RESUME_TOKEN_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def write_resume_token(path: str, token: Optional[Dict[str, Any]]):
+    os.makedirs(path, exist_ok=True)
+    tmp_path = os.path.join(path, RESUME_TOKEN_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(token, f)
+    os.replace(tmp_path, os.path.join(path, RESUME_TOKEN_FILE))
+
+
+async def capture_resume_token(collection) -> Optional[Dict[str, Any]]:
+    """
+    Open a change stream and read back its current position.
+    Taken before a full rebuild, so edits made while the rebuild runs are replayed afterwards.
+    """
+    try:
+        async with collection.watch() as stream:
+            await stream.try_next()
+            return stream.resume_token
+    except PyMongoError as e:
+        print(f"[FAQ WATCHER] Could not capture resume token: {e}")
+        return None
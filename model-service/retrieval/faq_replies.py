@@ -0,0 +1,92 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from pymongo.errors import PyMongoError
+
+from models.llm_scheduler import llm_scheduler, LLM_MAX_IN_FLIGHT, PRIORITY_FALLBACK
+from models.response_pool import is_usable_reply
+from utils import metrics
+from .faq_index import answer_hash
+
+# ---------- FAQ reply pre-generation settings ---------- #
+FAQ_REPLY_PARALLELISM = int(os.getenv("FAQ_REPLY_PARALLELISM", "2"))  # generations in flight during ingest,
+                                                                       # capped at LLM_MAX_IN_FLIGHT
+
+FAQ_REPLY_PROMPT = """
+You are Harold, a polite and professional hotel assistant.
+
+Rewrite the FAQ answer below as a friendly reply to a guest who asked the question.
+Keep every fact from the answer and do not add new ones.
+Keep the reply polite, helpful, and concise. Do not introduce yourself.
+
+Q: {question}
+A: {answer}
+"""
+
+
+def reply_is_stale(doc: Dict[str, Any]) -> bool:
+    """True when the FAQ has no reply yet or the reply was generated for an older answer."""
+    return not doc.get("reply") or doc.get("reply_answer_hash") != answer_hash(doc["answer"])
+
+
+def reply_workers(parallelism: int = FAQ_REPLY_PARALLELISM) -> int:
+    """Generations to run at once; more than the scheduler's slots would only queue up behind each other."""
+    return min(max(parallelism, 1), LLM_MAX_IN_FLIGHT)
+
+
+async def generate_faq_reply(question: str, answer: str) -> Optional[str]:
+    prompt = FAQ_REPLY_PROMPT.format(question=question, answer=answer)
+    # No guest is waiting on this reply, so queue behind chat turns instead of taking the busy message
+    stream = llm_scheduler.stream(prompt=prompt, priority=PRIORITY_FALLBACK, wait_for_slot=True)
+    reply = "".join([token async for token in stream])
+    return reply.strip() if is_usable_reply(reply) else None
+
+
+async def store_faq_reply(collection, doc: Dict[str, Any], semaphore: asyncio.Semaphore) -> bool:
+    """Generate the reply for one FAQ document and store it next to the answer."""
+    async with semaphore:
+        reply = await generate_faq_reply(doc["question"], doc["answer"])
+    if reply is None:
+        metrics.increment("faq_replies.failed")
+        print(f"[FAQ REPLIES] No usable reply for {doc['_id']}, keeping live generation")
+        return False
+
+    try:
+        # Only write if the answer is still the one the reply was generated from
+        result = await collection.update_one(
+            {"_id": doc["_id"], "answer": doc["answer"]},
+            {"$set": {
+                "reply": reply,
+                "reply_answer_hash": answer_hash(doc["answer"]),
+                "reply_generated_at": datetime.now(timezone.utc),
+            }},
+        )
+    except PyMongoError as e:
+        print(f"[FAQ REPLIES] Could not store reply for {doc['_id']}: {e}")
+        return False
+    metrics.increment("faq_replies.generated")
+    return result.modified_count > 0
+
+
+async def pregenerate_faq_replies(collection, parallelism: int = FAQ_REPLY_PARALLELISM, force: bool = False) -> int:
+    """
+    Ingest stage: write a conversational reply for every FAQ whose reply is
+    missing or stale, at most `parallelism` generations at a time.
+    Returns the number of replies stored.
+    """
+    parallelism = reply_workers(parallelism)
+    semaphore = asyncio.Semaphore(parallelism)
+    docs = [
+        doc async for doc in collection.find({}, {"question": 1, "answer": 1, "reply": 1, "reply_answer_hash": 1})
+        if "question" in doc and "answer" in doc and (force or reply_is_stale(doc))
+    ]
+    if not docs:
+        print("[FAQ REPLIES] All FAQ replies are up to date")
+        return 0
+
+    print(f"[FAQ REPLIES] Generating {len(docs)} replies ({parallelism} at a time)")
+    stored = await asyncio.gather(*(store_faq_reply(collection, doc, semaphore) for doc in docs))
+    print(f"[FAQ REPLIES] Stored {sum(stored)}/{len(docs)} replies")
+    return sum(stored)
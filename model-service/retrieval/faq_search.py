@@ -1,58 +1,155 @@
-from config.mongoDB import db
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain.schema import Document
-from utils.calculate_consine_similarity import calculate_consine_similarity
+import asyncio
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from pymongo import UpdateOne
+
+from utils import metrics
+from utils.turn_features import TurnFeatures
+from .embedding import embedding_engine
+from .faq_index import FaqIndex, FaqHit, IndexConfig, faq_from_doc, question_embedding_fields, stored_question_vector
+from .faq_manifest import compute_faq_fingerprint, read_manifest, write_manifest, capture_resume_token, write_resume_token
 
 # Global FAISS index
-faiss_index = None
+faiss_index: Optional[FaqIndex] = None
 faiss_path = "./faiss_store"
 
-# Use HuggingFaceEmbeddings for LangChain FAISS
-embeddings_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+# Number of candidates returned by search_faqs
+FAQ_TOP_K = 3
+
+# Intent partitions: searched alone only for a confident intent and a strong match
+FAQ_PARTITION_MIN_CONFIDENCE = float(os.getenv("FAQ_PARTITION_MIN_CONFIDENCE", "0.8"))
+FAQ_PARTITION_MIN_SCORE = float(os.getenv("FAQ_PARTITION_MIN_SCORE", "0.6"))
+
+# Fields read from MongoDB when (re)building the index
+FAQ_PROJECTION = {
+    "question": 1,
+    "answer": 1,
+    "paraphrases": 1,
+    "intent": 1,
+    "question_embedding": 1,
+    "question_embedding_version": 1,
+    "question_embedding_hash": 1,
+    "reply": 1,
+    "reply_answer_hash": 1,
+}
+
+
+async def collect_question_vectors(docs: List[Dict]) -> Tuple[np.ndarray, List[int]]:
+    """
+    Read the stored question vectors of all docs into one contiguous float32 array.
+    Only documents without a vector, or whose vector is tagged with another
+    embedding version or question text, are encoded. Returns the array and
+    the positions that had to be encoded.
+    """
+    stored = [stored_question_vector(doc) for doc in docs]
+    missing = [i for i, vector in enumerate(stored) if vector is None]
+
+    fresh = None
+    if missing:
+        fresh = await asyncio.to_thread(embedding_engine.encode_batch, [docs[i]["question"] for i in missing])
+    dimension = fresh.shape[1] if fresh is not None else stored[0].shape[0]
+
+    vectors = np.empty((len(docs), dimension), dtype=np.float32)
+    for i, vector in enumerate(stored):
+        if vector is not None:
+            vectors[i] = vector
+    if fresh is not None:
+        vectors[missing] = fresh
+    return vectors, missing
+
+
+async def store_question_vectors(collection, docs: List[Dict], vectors: np.ndarray, positions: List[int]):
+    """
+    Write freshly encoded vectors back with their version tag, so the next build can reuse them.
+    Best effort: a failed write-back only costs re-encoding on the next build.
+    """
+    if not positions:
+        return
+    try:
+        await collection.bulk_write([
+            UpdateOne({"_id": docs[i]["_id"]}, {"$set": question_embedding_fields(docs[i]["question"], vectors[i])})
+            for i in positions
+        ], ordered=False)
+    except Exception as e:
+        print(f"[FAISS] Could not store question embeddings: {e}")
+
 
 # Load FAQ data and store it into a vector database (such as FAISS).
-async def load_faqs_from_mongodb(db_instance):
+async def load_faqs_from_mongodb(db_instance, force_rebuild: bool = False) -> bool:
     """
     Load FAQ documents from MongoDB and embed only the question.
+    If the corpus fingerprint matches the manifest saved next to the index,
+    the stored index is memory-mapped instead of re-embedding every FAQ.
+    An empty corpus installs an empty index. Building and saving run in a
+    worker thread (IVF-PQ training takes tens of seconds), and the new index
+    replaces the live one only once it is complete; until then, and after a
+    failure, searches keep using the previous index. Returns False when loading failed.
     """
     global faiss_index
     print('[FAISS] Loading FAQs from MongoDB...')
 
     try:
         faqs_collection = db_instance["faqs"]
-        cursor = faqs_collection.find({})
-        docs = await cursor.to_list(length=None)   # M)
-        documents = []
-
-        for doc in docs:
+        fingerprint = await compute_faq_fingerprint(faqs_collection)
+        manifest = read_manifest(faiss_path)
+        if not force_rebuild and manifest and manifest.get("fingerprint") == fingerprint:
+            try:
+                faiss_index = FaqIndex.load(faiss_path, mmap=True, config=IndexConfig())
+                print(f"[FAISS] Corpus unchanged, warm-started {len(faiss_index)} documents from disk.")
+                return True
+            except Exception as e:
+                print(f"[FAISS] Warm start failed, rebuilding: {e}")
+
+        # Change stream position before reading, so the watcher replays edits made during the rebuild
+        resume_token = await capture_resume_token(faqs_collection)
+        cursor = faqs_collection.find({}, FAQ_PROJECTION)
+        docs = []
+
+        async for doc in cursor:
             if "question" in doc and "answer" in doc:
-                q = doc["question"]
-                a = doc["answer"]
-                documents.append(Document(page_content=f"Q:{q} \nA:{a}", metadata={"question": q, "answer": a}))
+                docs.append(doc)
             else:
-                print(f"[FAISS] Skipped invalid doc: {doc}")
-
-        if not documents:
-            print("[FAISS] No valid docs found.")
-            return
-
-        # Create FAISS index fr
-        print(f"documents: {documents}")
-        faiss_index = FAISS.from_documents(documents, embeddings_model)
+                print(f"[FAISS] Skipped invalid doc: {doc['_id']}")
+
+        if not docs:
+            # Dropped or emptied collection: stop serving deleted answers, and move the
+            # resume token past the drop so the watcher does not rebuild again
+            print("[FAISS] No valid docs found, serving an empty index.")
+            dimension = faiss_index.dimension if faiss_index is not None else await asyncio.to_thread(lambda: embedding_engine.dimension)
+            empty_index = FaqIndex(dimension)
+            await asyncio.to_thread(empty_index.save, faiss_path)
+            write_resume_token(faiss_path, resume_token)
+            write_manifest(faiss_path, fingerprint)
+            faiss_index = empty_index
+            return True
+
+        # Normalized question vectors -> inner product index, so search scores are cosine similarities
+        vectors, encoded = await collect_question_vectors(docs)
+        print(f"[FAISS] Reused {len(docs) - len(encoded)} stored vectors, encoded {len(encoded)}.")
+        new_index = await asyncio.to_thread(FaqIndex.build, [faq_from_doc(doc) for doc in docs], vectors, IndexConfig())
         # let vector data to store in disk instead of memory, for better persistence, when the system close still available
-        faiss_index.save_local(faiss_path)
-        print(f"[FAISS] Loaded {len(documents)} documents into FAISS.")
+        await asyncio.to_thread(new_index.save, faiss_path)
+        write_resume_token(faiss_path, resume_token)
+        write_manifest(faiss_path, fingerprint)
+        faiss_index = new_index
+        print(f"[FAISS] Loaded {len(docs)} documents into FAISS.")
 
     except Exception as e:
+        # Keep serving the previous index (None on a first load that failed)
         print(f"[FAISS] Error loading data: {e}")
-        faiss_index = None
+        return False
+
+    # Outside the try above: the index is already built and saved, a failed write-back must not drop it
+    await store_question_vectors(faqs_collection, docs, vectors, encoded)
+    return True
 
 
 def reload_faiss_index():
     global faiss_index
     try:
-        faiss_index = FAISS.load_local(faiss_path, embeddings_model, allow_dangerous_deserialization=True)
+        faiss_index = FaqIndex.load(faiss_path, config=IndexConfig())
         print("[FAISS] Reloaded index from disk.")
     except Exception as e:
         print(f"[FAISS] Failed to reload: {e}")
@@ -62,12 +159,47 @@ def reload_faiss_index():
 """
     vector search
 """
+async def search_faqs(
+    query: str,
+    k: int = FAQ_TOP_K,
+    intent: Optional[str] = None,
+    confidence: float = 0.0,
+    features: Optional[TurnFeatures] = None,
+) -> List[FaqHit]:
+    """
+    Returns the top-k FAQ hits with their cosine score and stored question vector.
+    The query is encoded at most once (repeat questions come from the embedding cache);
+    the scores come straight from the inner-product search.
+    With a confident intent only that intent's partition is searched, unless
+    its best score is weak, in which case the whole corpus is searched after all.
+    """
+    if faiss_index is None:
+        return []
+
+    features = features or TurnFeatures(query)
+    query_vector = await features.embedding()
+    return route_search(faiss_index, query_vector, k, intent, confidence)
+
+
+def route_search(index: FaqIndex, query_vector: np.ndarray, k: int, intent: Optional[str], confidence: float) -> List[FaqHit]:
+    """Search the intent's partition when the intent is confident, else (or on a weak best score) the global index."""
+    partition = index.partition(intent) if confidence >= FAQ_PARTITION_MIN_CONFIDENCE else None
+    if partition is not None:
+        hits = partition.search(query_vector, k=k)
+        if hits and hits[0].score >= FAQ_PARTITION_MIN_SCORE:
+            metrics.increment("faq_partition.hit")
+            return hits
+        metrics.increment("faq_partition.fallback")
+    metrics.increment("faq_partition.miss")
+    return index.search(query_vector, k=k)
+
+
 # Use vector search to find the best matching questions.
-async def find_best_faq(query):
+async def find_best_faq(query, intent: Optional[str] = None, confidence: float = 0.0, features: Optional[TurnFeatures] = None):
     """
     Returns the best matching FAQ (if similarity > 0.8) or fallback.
+    intent/confidence come from the intent detector and narrow the search to that intent's FAQs.
     """
-    global faiss_index
     if faiss_index is None:
         print("[FAISS] Index not available.")
         reload_faiss_index()
@@ -75,16 +207,24 @@ async def find_best_faq(query):
 
     try:
         print(f"[FAISS] Query: {query}")
-        print(f"[FAISS] faiss index2: {faiss_index}")
-        result, distance = faiss_index.similarity_search_with_score(query, k=1)[0]
-
-        if not result:
+        # Near-verbatim FAQ questions skip the embedding and the vector search entirely
+        features = features or TurnFeatures(query)
+        exact = faiss_index.match_exact(query, normalized=features.normalized)
+        if exact is not None:
+            metrics.increment("faq_exact.hit")
+            print("[FAISS] Exact match, score: 1.0")
+            return (1.0, exact)
+        metrics.increment("faq_exact.miss")
+
+        hits = await search_faqs(query, k=1, intent=intent, confidence=confidence, features=features)
+
+        if not hits:
             return 0.0, {"question": "", "answer": ""}
 
-        # calculate similarity score by using cosine similarity
-        score = calculate_consine_similarity(query, result.metadata["question"]) 
-        print(f"[FAISS] Score: {score}")
-        return (score, result.metadata)
+        # the inner product of normalized vectors is the cosine similarity
+        best = hits[0]
+        print(f"[FAISS] Score: {best.score}")
+        return (best.score, best.faq)
 
     except Exception as e:
         print(f"[FAISS] Error during search: {e}")
@@ -0,0 +1,194 @@
+import asyncio
+import os
+from typing import Any, Dict, Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from . import faq_search
+from .embedding import embedding_engine
+from .faq_index import FaqIndex, faq_from_doc, stored_question_vector
+from .faq_manifest import compute_faq_fingerprint, write_manifest, read_resume_token, write_resume_token
+from .faq_replies import reply_is_stale, reply_workers, store_faq_reply
+
+RETRY_DELAY = 5  # seconds between reconnect attempts
+REBUILD_MAX_DELAY = 300  # cap of the exponential backoff between failed rebuilds
+# Applied changes are saved together at most this often; a restart replays the unsaved ones from the stored token
+FAQ_PERSIST_INTERVAL = float(os.getenv("FAQ_PERSIST_INTERVAL", "10"))
+
+# MongoDB error codes that mean the change stream cannot continue as-is
+NOT_A_REPLICA_SET = 40573
+CHANGE_STREAM_HISTORY_LOST = 286
+
+
+# apply_faq_change results
+APPLIED = "applied"    # index changed, persist it
+IGNORED = "ignored"    # nothing to do for the index
+REBUILD = "rebuild"    # cannot be applied incrementally
+
+
+def only_embedding_fields_changed(change: Dict[str, Any]) -> bool:
+    """Updates that just (re)store question vectors, e.g. written back by an index build."""
+    description = change.get("updateDescription")
+    if not description:
+        return False
+    changed = list(description.get("updatedFields", {})) + list(description.get("removedFields", []))
+    return bool(changed) and all(field.startswith("question_embedding") for field in changed)
+
+
+async def apply_faq_change(change: Dict[str, Any]) -> str:
+    """
+    Apply one change event to the live index in place.
+    Returns REBUILD when the event cannot be applied incrementally (drop,
+    rename, invalidate) and the index has to be rebuilt from the collection.
+    """
+    operation = change["operationType"]
+    doc_id = str(change.get("documentKey", {}).get("_id"))
+
+    if operation == "update" and only_embedding_fields_changed(change):
+        return IGNORED
+
+    if operation in ("insert", "update", "replace"):
+        doc = change.get("fullDocument")
+        if not doc or "question" not in doc or "answer" not in doc:
+            # Deleted again before the lookup, or no longer a valid FAQ
+            if faq_search.faiss_index is not None:
+                faq_search.faiss_index.remove(doc_id)
+            return APPLIED
+
+        faq = faq_from_doc(doc)
+        if faq_search.faiss_index is not None and faq_search.faiss_index.update_in_place(faq):
+            # Same question (e.g. an edited answer or a stored reply): the vector stays as it is
+            print(f"[FAQ WATCHER] {operation} {doc_id} (metadata only)")
+            return APPLIED
+        vector = stored_question_vector(doc)
+        if vector is None:
+            vector = await asyncio.to_thread(embedding_engine.encode, faq["question"])
+        if faq_search.faiss_index is None:
+            faq_search.faiss_index = FaqIndex(vector.shape[0])
+        faq_search.faiss_index.upsert(faq, vector)
+        print(f"[FAQ WATCHER] {operation} {doc_id}")
+        return APPLIED
+
+    if operation == "delete":
+        if faq_search.faiss_index is not None:
+            faq_search.faiss_index.remove(doc_id)
+        print(f"[FAQ WATCHER] delete {doc_id}")
+        return APPLIED
+
+    return REBUILD
+
+
+async def persist_faq_index(collection, path: str, token: Optional[Dict[str, Any]]):
+    """Save the index, then the resume token, then a fresh manifest so the next boot can warm-start."""
+    if faq_search.faiss_index is not None:
+        await asyncio.to_thread(faq_search.faiss_index.save, path)
+    write_resume_token(path, token)
+    try:
+        write_manifest(path, await compute_faq_fingerprint(collection))
+    except PyMongoError as e:
+        print(f"[FAQ WATCHER] Could not refresh manifest: {e}")
+
+
+async def rebuild_faq_index(collection, path: str) -> Optional[Dict[str, Any]]:
+    """
+    Rebuild the index from the collection, retrying with exponential backoff
+    until it succeeds. Returns the resume token the rebuild stored.
+    """
+    delay = RETRY_DELAY
+    while not await faq_search.load_faqs_from_mongodb(collection.database, force_rebuild=True):
+        print(f"[FAQ WATCHER] Rebuild failed, retrying in {delay}s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, REBUILD_MAX_DELAY)
+    return read_resume_token(path)
+
+
+def schedule_reply_regeneration(collection, change: Dict[str, Any], tasks: Dict[str, asyncio.Task], semaphore: asyncio.Semaphore):
+    """Regenerate the stored reply in the background when an inserted or edited FAQ no longer has a matching one."""
+    doc = change.get("fullDocument")
+    if change["operationType"] not in ("insert", "update", "replace") or not doc or "answer" not in doc:
+        return
+    doc_id = str(doc["_id"])
+    running = tasks.get(doc_id)
+    if reply_is_stale(doc) and (running is None or running.done()):
+        tasks[doc_id] = asyncio.create_task(store_faq_reply(collection, doc, semaphore))
+
+
+async def watch_faq_changes(collection, path: str = faq_search.faiss_path):
+    """
+    Background task: follow the change stream on the faqs collection and keep
+    the FAISS index in sync without a full rebuild.
+    Resumes from the token stored next to the index after a restart.
+    """
+    token = read_resume_token(path)
+    print(f"[FAQ WATCHER] Watching FAQ changes (resume: {token is not None})")
+    reply_tasks: Dict[str, asyncio.Task] = {}
+    reply_semaphore = asyncio.Semaphore(reply_workers())
+    try:
+        await _follow_faq_changes(collection, path, token, reply_tasks, reply_semaphore)
+    finally:
+        pending = [task for task in reply_tasks.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _follow_faq_changes(collection, path: str, token, reply_tasks, reply_semaphore):
+    """
+    Apply change events as they come. Applied changes are saved together at
+    most once per FAQ_PERSIST_INTERVAL instead of rewriting the whole index on
+    every event; the stored token only moves with the index it belongs to, so
+    after a crash the unsaved events are replayed. Pending changes are saved
+    when the watcher stops.
+    """
+    loop = asyncio.get_running_loop()
+    unsaved = False  # applied changes not written to disk yet
+    last_saved = loop.time()
+    try:
+        while True:
+            try:
+                rebuild_needed = False
+                async with collection.watch(full_document="updateLookup", resume_after=token) as stream:
+                    async for change in stream:
+                        result = await apply_faq_change(change)
+                        if result == APPLIED and faq_search.faiss_index is not None and faq_search.faiss_index.needs_rebuild:
+                            # Too many deleted HNSW nodes still sit in the graph
+                            result = REBUILD
+                        if result == REBUILD:
+                            print(f"[FAQ WATCHER] {change['operationType']} event, rebuilding index")
+                            rebuild_needed = True
+                            break
+                        token = change["_id"]
+                        if result == APPLIED:
+                            schedule_reply_regeneration(collection, change, reply_tasks, reply_semaphore)
+                            unsaved = True
+                        if not unsaved:
+                            write_resume_token(path, token)
+                        elif loop.time() - last_saved >= FAQ_PERSIST_INTERVAL:
+                            await persist_faq_index(collection, path, token)
+                            unsaved, last_saved = False, loop.time()
+
+                if rebuild_needed:
+                    # The rebuild saves the index and its own token
+                    token = await rebuild_faq_index(collection, path)
+                    unsaved, last_saved = False, loop.time()
+                    continue
+
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code == NOT_A_REPLICA_SET:
+                    print("[FAQ WATCHER] MongoDB is not a replica set, change streams disabled.")
+                    return
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    print("[FAQ WATCHER] Resume token expired, rebuilding index")
+                    token = await rebuild_faq_index(collection, path)
+                    unsaved, last_saved = False, loop.time()
+                    continue
+                print(f"[FAQ WATCHER] Change stream error: {e}")
+            except PyMongoError as e:
+                print(f"[FAQ WATCHER] Change stream error: {e}")
+
+            await asyncio.sleep(RETRY_DELAY)
+    finally:
+        if unsaved:
+            await persist_faq_index(collection, path, token)
@@ -0,0 +1,61 @@
+import os
+from typing import List
+
+import numpy as np
+
+ONNX_MODEL_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+MAX_SEQ_LENGTH = 256  # same truncation as sentence-transformers' all-MiniLM-L6-v2
+ONNX_NUM_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))  # 0 = let ONNX Runtime decide
+
+
+class OnnxEmbeddingBackend:
+    """
+    MiniLM through ONNX Runtime, using the int8 dynamically quantized export
+    written by models/train_model/export_embedding_onnx.py.
+    Reproduces the sentence-transformers pipeline: mean pooling over the
+    attention mask followed by L2 normalization.
+    """
+
+    def __init__(self, model_dir: str, batch_size: int = 32):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError("EMBEDDING_BACKEND=onnx requires the onnxruntime package (pip install onnxruntime)") from e
+
+        model_path = os.path.join(model_dir, ONNX_MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise RuntimeError(f"{model_path} not found, run: python models/train_model/export_embedding_onnx.py")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_NUM_THREADS:
+            options.intra_op_num_threads = ONNX_NUM_THREADS
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.dimension = int(self.session.get_outputs()[0].shape[-1])
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+        self.batch_size = batch_size
+
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        return np.vstack([
+            self._encode(texts[start:start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ])
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {k: v for k, v in inputs.items() if k in self.input_names})[0]
+
+        mask = inputs["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
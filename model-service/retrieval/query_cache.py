@@ -0,0 +1,84 @@
+import base64
+import hashlib
+import os
+from typing import Optional
+
+import numpy as np
+from redis.exceptions import RedisError
+
+from config.redis import redis_client
+from utils import metrics
+from utils.lru_cache import TTLLRUCache
+from utils.text_normalizer import normalize_text
+from .embedding import EMBEDDING_VERSION
+from .embedding_batcher import embedding_batcher
+
+# ---------- Query embedding cache settings ---------- #
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2048"))          # entries kept in-process
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))          # seconds, in-process tier
+QUERY_CACHE_REDIS_TTL = int(os.getenv("QUERY_CACHE_REDIS_TTL", "86400"))  # seconds, Redis tier
+# The embedding version is part of the key so a model or backend change never serves stale vectors
+QUERY_CACHE_PREFIX = f"query_embedding:{EMBEDDING_VERSION}:"
+
+
+class QueryEmbeddingCache:
+    """
+    Two-tier cache of query embeddings keyed by normalized question text.
+    Tier 1 is a bounded in-process LRU with TTL; tier 2 is Redis, shared by
+    every worker and node. Hits and misses are counted per tier in metrics.
+    """
+
+    def __init__(self, max_size: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL, redis_ttl: int = QUERY_CACHE_REDIS_TTL):
+        self.local = TTLLRUCache(max_size=max_size, ttl=ttl)
+        self.redis_ttl = redis_ttl
+
+    @staticmethod
+    def redis_key(normalized: str) -> str:
+        return QUERY_CACHE_PREFIX + hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+    async def get_embedding(self, text: str, normalized: Optional[str] = None) -> np.ndarray:
+        if normalized is None:
+            normalized = normalize_text(text)
+
+        vector = self.local.get(normalized)
+        if vector is not None:
+            metrics.increment("query_cache.local.hit")
+            metrics.increment("query_cache.hit")
+            return vector
+        metrics.increment("query_cache.local.miss")
+
+        vector = await self._get_shared(normalized)
+        if vector is not None:
+            metrics.increment("query_cache.redis.hit")
+            metrics.increment("query_cache.hit")
+            self.local.set(normalized, vector)
+            return vector
+        metrics.increment("query_cache.redis.miss")
+        metrics.increment("query_cache.miss")
+
+        # Concurrent misses from different chat turns share one batched encode
+        vector = await embedding_batcher.encode(text)
+        self.local.set(normalized, vector)
+        await self._set_shared(normalized, vector)
+        return vector
+
+    async def _get_shared(self, normalized: str) -> Optional[np.ndarray]:
+        try:
+            raw = await redis_client.get(self.redis_key(normalized))
+        except RedisError as e:
+            print(f"[QUERY CACHE] Redis read failed: {e}")
+            return None
+        if not raw:
+            return None
+        # redis_client decodes responses to str, so vectors are stored as base64
+        return np.frombuffer(base64.b64decode(raw), dtype=np.float32)
+
+    async def _set_shared(self, normalized: str, vector: np.ndarray):
+        try:
+            encoded = base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+            await redis_client.set(self.redis_key(normalized), encoded, ex=self.redis_ttl)
+        except RedisError as e:
+            print(f"[QUERY CACHE] Redis write failed: {e}")
+
+
+query_embedding_cache = QueryEmbeddingCache()
@@ -1,10 +1,10 @@
-from pymongo import MongoClient
-from sentence_transformers import SentenceTransformer
-import json
+import argparse
+import asyncio
 from config.mongoDB import db, mongo_client
-
-# Load Sentence Transformer model
-model = SentenceTransformer("all-MiniLM-L6-v2")
+from models.llm import close_llm_session
+from retrieval.embedding import embedding_engine
+from retrieval.faq_index import question_embedding_fields
+from retrieval.faq_replies import FAQ_REPLY_PARALLELISM, pregenerate_faq_replies
 
 FAQ_COLLECTION  = "faqs"
 
@@ -20,29 +20,46 @@ sample_faqs = [
     {"question": "Does the hotel provide laundry service?", "answer": "Yes, we provide self-service laundry and laundry delivery services. Please contact the front desk for details."}
 ]
 
-def insert_faqs_with_embeddings():
+async def insert_faqs_with_embeddings():
     faqs_collection = db[FAQ_COLLECTION]
 
     # clear existing FAQs for a clean and start
-    faqs_collection.delete_many({})
+    await faqs_collection.delete_many({})
     print('Cleared existing FAQs in MongoDB')
 
+    # Encode every question in a single batch with the shared embedding engine
+    question_embeddings = embedding_engine.encode_batch([faq['question'] for faq in sample_faqs])
+
     faqs_to_insert = []
-    for faq in sample_faqs:
-        question_embedding = model.encode(faq['question']).tolist()
+    for faq, question_embedding in zip(sample_faqs, question_embeddings):
+        # The vector is stored with its embedding version tag, so index builds can reuse it
         faqs_to_insert.append({
             "question": faq['question'],
             "answer": faq['answer'],
-            "question_embedding": question_embedding
+            **question_embedding_fields(faq['question'], question_embedding)
         })
 
     if faqs_to_insert:
-        faqs_collection.insert_many(faqs_to_insert)
+        await faqs_collection.insert_many(faqs_to_insert)
         print(f'Inserted {len(faqs_to_insert)} FAQs with embeddings into MongoDB.')
     else:
         print("No FAQs to insert. ")
-    
-    mongo_client.close()
+
+
+async def main(replies_only: bool, force_replies: bool, parallelism: int):
+    try:
+        if not replies_only:
+            await insert_faqs_with_embeddings()
+        # Friendly replies are generated once here, so chat turns can stream them without the LLM
+        await pregenerate_faq_replies(db[FAQ_COLLECTION], parallelism=parallelism, force=force_replies)
+    finally:
+        await close_llm_session()
+        mongo_client.close()
 
 if __name__ == "__main__":
-    insert_faqs_with_embeddings()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--replies-only", action="store_true", help="keep the FAQs, only (re)generate missing or stale replies")
+    parser.add_argument("--force-replies", action="store_true", help="regenerate every reply, even up-to-date ones")
+    parser.add_argument("--parallelism", type=int, default=FAQ_REPLY_PARALLELISM, help="LLM generations in flight (capped at LLM_MAX_IN_FLIGHT)")
+    args = parser.parse_args()
+    asyncio.run(main(args.replies_only, args.force_replies, args.parallelism))
\ No newline at end of file
@@ -1,3 +1,12 @@
+import asyncio
+import os
+from typing import Any, AsyncGenerator, AsyncIterable, Tuple
+
+# ---------- Websocket token coalescing ---------- #
+STREAM_COALESCE_MS = float(os.getenv("STREAM_COALESCE_MS", "50"))       # flush buffered tokens at least this often
+STREAM_COALESCE_CHARS = int(os.getenv("STREAM_COALESCE_CHARS", "80"))   # ... or once this many characters are waiting
+
+
 async def chunkedStream(text: str, chunk_size: int = 20):
     """
     将文本切分成小片段，用于流式发送。
@@ -10,4 +19,72 @@ async def chunkedStream(text: str, chunk_size: int = 20):
         chunk = text[start:end]
         is_final = end == total_len
         yield chunk, is_final
-        start = end
\ No newline at end of file
+        start = end
+
+
+async def coalescedStream(
+    stream: AsyncIterable[Tuple[Any, bool]],
+    max_wait_ms: float = STREAM_COALESCE_MS,
+    max_chars: int = STREAM_COALESCE_CHARS,
+) -> AsyncGenerator[Tuple[Any, bool], None]:
+    """
+    The reverse of chunkedStream: merge small (token, is_final) pieces into
+    larger chunks, so a long answer becomes a few frames instead of one per token.
+    Buffered text is flushed max_wait_ms after its first token arrived or
+    once max_chars are waiting, whichever comes first, and always before an
+    is_final piece or a non-text token (e.g. the handover dict), which pass through as-is.
+    max_wait_ms <= 0 disables coalescing.
+    """
+    if max_wait_ms <= 0:
+        async for token, is_final in stream:
+            yield token, is_final
+        return
+
+    loop = asyncio.get_running_loop()
+    iterator = stream.__aiter__()
+    buffer = []
+    buffered_chars = 0
+    deadline = None
+    next_piece = None
+    try:
+        while True:
+            if next_piece is None:
+                next_piece = asyncio.ensure_future(iterator.__anext__())
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            done, _ = await asyncio.wait({next_piece}, timeout=timeout)
+
+            if not done:
+                # Time's up for the buffered text; keep waiting for the same piece
+                yield "".join(buffer), False
+                buffer, buffered_chars, deadline = [], 0, None
+                continue
+
+            piece, next_piece = next_piece, None
+            try:
+                token, is_final = piece.result()
+            except StopAsyncIteration:
+                break
+
+            if isinstance(token, str) and not is_final:
+                if not buffer:
+                    deadline = loop.time() + max_wait_ms / 1000
+                buffer.append(token)
+                buffered_chars += len(token)
+                if buffered_chars >= max_chars:
+                    yield "".join(buffer), False
+                    buffer, buffered_chars, deadline = [], 0, None
+                continue
+
+            if buffer:
+                yield "".join(buffer), False
+                buffer, buffered_chars, deadline = [], 0, None
+            yield token, is_final
+
+        if buffer:
+            yield "".join(buffer), False
+    finally:
+        if next_piece is not None:
+            next_piece.cancel()
+            await asyncio.gather(next_piece, return_exceptions=True)
+        if hasattr(iterator, "aclose"):
+            await iterator.aclose()
@@ -0,0 +1,140 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from utils import metrics
+from utils.chunkedStream import coalescedStream, STREAM_COALESCE_MS, STREAM_COALESCE_CHARS
+
+# ---------- Websocket dispatch settings ---------- #
+# Chat turns processed at the same time across all conversations on one socket
+WS_MAX_CONCURRENCY = int(os.getenv("WS_MAX_CONCURRENCY", "32"))
+# A newer message cancels the answer still streaming for the same conversation
+WS_PREEMPT = os.getenv("WS_PREEMPT", "false").lower() == "true"
+
+Handler = Callable[[dict], AsyncGenerator[Tuple[Any, bool], None]]
+Sender = Callable[[dict], Awaitable[None]]
+
+
+class ConversationDispatcher:
+    """
+    Runs chat turns from one shared websocket concurrently.
+    Each conversationId gets its own worker that handles that conversation's
+    messages strictly in arrival order; different conversations run in
+    parallel, bounded by a global semaphore. Every outgoing frame goes through
+    one writer task, so frames from different turns never interleave mid-send.
+    Tokens are coalesced into larger frames (see coalescedStream) before sending.
+    Closing the dispatcher, or pre-emption by a newer message, cancels the
+    running turn; the cancellation reaches stream_llm, which aborts the Ollama request.
+    A worker takes its next payload only once it holds a slot, so a message
+    superseded while waiting for admission never runs.
+    """
+
+    def __init__(
+        self,
+        handler: Handler,
+        send: Sender,
+        max_concurrency: int = WS_MAX_CONCURRENCY,
+        coalesce_ms: float = STREAM_COALESCE_MS,
+        coalesce_chars: int = STREAM_COALESCE_CHARS,
+        preempt: bool = WS_PREEMPT,
+    ):
+        self.handler = handler
+        self.send = send
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.coalesce_ms = coalesce_ms
+        self.coalesce_chars = coalesce_chars
+        self.preempt = preempt
+        self.pending: Dict[str, Deque[dict]] = {}      # conversationId -> payloads waiting for its worker
+        self.workers: Dict[str, asyncio.Task] = {}
+        self.turns: Dict[str, asyncio.Task] = {}       # conversationId -> turn currently streaming
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        self.writer: Optional[asyncio.Task] = None
+
+    def post(self, frame: dict):
+        """Send a frame through the writer task, after any frames already queued."""
+        if self.writer is None:
+            self.writer = asyncio.create_task(self._write())
+        self.outbox.put_nowait(frame)
+
+    def submit(self, payload: dict):
+        """Queue one payload behind earlier messages of the same conversation."""
+        if self.writer is None:
+            self.writer = asyncio.create_task(self._write())
+
+        conversation_id = str(payload.get("conversationId"))
+        queue = self.pending.setdefault(conversation_id, deque())
+        if self.preempt:
+            # Older messages of this conversation are superseded: queued (including one
+            # whose worker is still waiting for a slot) or running
+            if queue:
+                metrics.increment("ws.preempted_queued", len(queue))
+            queue.clear()
+            turn = self.turns.get(conversation_id)
+            if turn is not None:
+                turn.cancel()
+        queue.append(payload)
+        if conversation_id not in self.workers:
+            self.workers[conversation_id] = asyncio.create_task(self._work(conversation_id))
+        metrics.set_gauge("ws.active_conversations", len(self.workers))
+
+    async def close(self):
+        """Stop all turns (the socket is gone, nobody can receive their frames)."""
+        tasks = [*self.turns.values(), *self.workers.values()]
+        if self.writer is not None:
+            tasks.append(self.writer)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers.clear()
+        self.pending.clear()
+        metrics.set_gauge("ws.active_conversations", 0)
+
+    async def _work(self, conversation_id: str):
+        queue = self.pending[conversation_id]
+        try:
+            while queue:
+                queued_at = time.perf_counter()
+                async with self.semaphore:
+                    metrics.observe("ws.concurrency_wait_ms", (time.perf_counter() - queued_at) * 1000)
+                    # Picked only now: pre-emption may have replaced the payload while this waited
+                    payload = queue.popleft()
+                    turn = asyncio.create_task(self._run_turn(conversation_id, payload))
+                    self.turns[conversation_id] = turn
+                    try:
+                        await asyncio.wait({turn})
+                    finally:
+                        self.turns.pop(conversation_id, None)
+                        turn.cancel()  # no-op unless the worker itself is being cancelled
+                if turn.cancelled():
+                    # Pre-empted by a newer message; close the partial answer on the client
+                    metrics.increment("ws.preempted")
+                    self.post({"conversationId": payload.get("conversationId"), "token": "", "isFinal": True})
+        finally:
+            # No await between the last empty check and this cleanup, so submit() cannot slip a payload in between
+            self.pending.pop(conversation_id, None)
+            self.workers.pop(conversation_id, None)
+            metrics.set_gauge("ws.active_conversations", len(self.workers))
+
+    async def _run_turn(self, conversation_id: str, payload: dict):
+        try:
+            async for token, is_final in coalescedStream(self.handler(payload), self.coalesce_ms, self.coalesce_chars):
+                metrics.increment("ws.frames")
+                self.post({
+                    "conversationId": payload.get("conversationId"),
+                    "token": token,
+                    "isFinal": is_final
+                })
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # One failing turn must not take the shared socket down for every other guest
+            print(f"[WS] Turn failed for {conversation_id}: {e}")
+            metrics.increment("ws.turn_errors")
+            self.post({"conversationId": payload.get("conversationId"), "error": str(e)})
+
+    async def _write(self):
+        while True:
+            frame = await self.outbox.get()
+            await self.send(frame)
@@ -1,8 +1,9 @@
 from constants.FSM_constant import FSM
 import json
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
 from .bookings import add_booking
+from .turn_features import TurnFeatures
 from config.redis import redis_client
 import spacy
 import re
@@ -28,16 +29,18 @@ patterns = [
 ruler.add_patterns(patterns) #type: ignore
 
 # ------------------ 实体抽取函数 ------------------ #
-async def extract_entities_for_booking_session(user_input: str, userType: str, conversationId: str, senderId: str):
+async def extract_entities_for_booking_session(user_input: str, userType: str, conversationId: str, senderId: str, features: Optional[TurnFeatures] = None):
     """
     从用户输入中提取实体，并在信息齐全时调用 add_booking()
+    features: 本轮共享的特征上下文（spaCy 解析、正则匹配只计算一次）
     """
+    features = features or TurnFeatures(user_input)
     # 首先从Redis获取所有步骤实体
     step_entities: Dict[str, str] = await redis_client.hgetall(f"{conversationId}:entities") or {}
     print(f"[DEBUG] Old entities from Redis: {step_entities}")
 
     # 从当前输入提取实体
-    doc = nlp(user_input)
+    doc = features.doc
     current_entities = {
         "checkInDate": None,
         "checkOutDate": None,
@@ -70,7 +73,7 @@ async def extract_entities_for_booking_session(user_input: str, userType: str, c
                 current_entities["roomTypes"].append(ent.text)
 
     # 额外的正则表达式提取
-    current_entities.update(extract_with_regex(user_input))
+    current_entities.update(extract_with_regex(user_input, features))
     print(f"[SPACY ENTITIES - CURRENT INPUT] {current_entities}")
 
     # 关键修复：映射步骤实体到预订实体
@@ -202,19 +205,22 @@ async def map_step_entities_to_booking_entities(step_entities: Dict[str, str], c
     return merged_entities
 
 
-def extract_with_regex(text: str) -> Dict[str, str]:
+EMAIL_PATTERN = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+PHONE_PATTERN = r'(\+?(\d{1,3})?[\s-]?)?(\(?\d{3}\)?[\s-]?\d{3,4}[\s-]?\d{3,4})'
+
+
+def extract_with_regex(text: str, features: Optional[TurnFeatures] = None) -> Dict[str, str]:
     """使用正则表达式补充提取实体"""
+    features = features or TurnFeatures(text)
     entities = {}
     
     # 邮箱提取
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    email_match = re.search(email_pattern, text)
+    email_match = features.search(EMAIL_PATTERN)
     if email_match:
         entities["contactEmail"] = email_match.group()
     
     # 电话号码提取
-    phone_pattern = r'(\+?(\d{1,3})?[\s-]?)?(\(?\d{3}\)?[\s-]?\d{3,4}[\s-]?\d{3,4})'
-    phone_match = re.search(phone_pattern, text)
+    phone_match = features.search(PHONE_PATTERN)
     if phone_match:
         entities["contactNumber"] = phone_match.group()
     
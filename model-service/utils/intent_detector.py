@@ -1,8 +1,100 @@
-from models import predict_intent
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
 
-async def detect_intent(user_input: str) -> str:
+from models import predict_intents_from_counts
+from utils import metrics
+from utils.lru_cache import TTLLRUCache
+from utils.turn_features import TurnFeatures
+
+# ---------- Intent front-end settings ---------- #
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "4096"))              # distinct inputs kept
+INTENT_MIN_CONFIDENCE = float(os.getenv("INTENT_MIN_CONFIDENCE", "0.5"))    # below this, do not enter an FSM flow
+
+HANDOFF_INTENT = "handoff"
+
+# Matched anywhere in the message: a request for a person wins over everything else
+HANDOFF_KEYWORDS = ["human", "customer service", "real people", "agent", "transfer to manual", "real agent", "real human", "real assistant"]
+# Matched only when they are the whole message, so "hi, I want to book a room" still reaches the model
+SHORT_PHRASES = {
+    "greeting": ["hi", "hello", "hey", "hi there", "hello there", "hey there", "good morning", "good afternoon", "good evening"],
+    "goodbye": ["bye", "goodbye", "bye bye", "see you", "see you later", "thanks bye", "thank you bye", "good night"],
+}
+
+
+def _alternation(phrases) -> str:
+    # Longest first, so "real agent" is preferred over "agent"
+    return "|".join(re.escape(phrase) for phrase in sorted(phrases, key=len, reverse=True))
+
+
+_HANDOFF_PATTERN = re.compile(rf"\b(?:{_alternation(HANDOFF_KEYWORDS)})")
+_SHORT_PHRASE_PATTERN = re.compile("|".join(
+    rf"(?P<{intent}>(?:{_alternation(phrases)}))" for intent, phrases in SHORT_PHRASES.items()
+))
+
+
+@dataclass(frozen=True)
+class IntentResult:
+    intent: str
+    confidence: float
+    source: str  # "keyword", "cache" or "model"
+
+
+def match_keyword_intent(text: str, features: Optional[TurnFeatures] = None) -> Optional[str]:
+    """Intent decided by keywords alone (handoff, greeting, goodbye), or None."""
+    features = features or TurnFeatures(text)
+    normalized = features.normalized
+    if _HANDOFF_PATTERN.search(normalized):
+        return HANDOFF_INTENT
+    match = _SHORT_PHRASE_PATTERN.fullmatch(normalized)
+    return match.lastgroup if match else None
+
+
+class IntentDetector:
+    """
+    Intent front-end: keyword patterns first, then a bounded LRU of
+    normalized inputs, and the neural classifier only when both miss.
+    Inputs are normalized to the classifier's own view of them (the sorted
+    vocabulary ids), so every text sharing an entry gets the same prediction.
+    Every result carries a confidence (1.0 for keywords, the softmax
+    probability otherwise) so callers can route uncertain turns differently.
+    """
+
+    def __init__(self, cache_size: int = INTENT_CACHE_SIZE):
+        self.cache = TTLLRUCache(max_size=cache_size)
+
+    def detect(self, text: str, features: Optional[TurnFeatures] = None) -> IntentResult:
+        features = features or TurnFeatures(text)
+        keyword_intent = match_keyword_intent(text, features)
+        if keyword_intent is not None:
+            metrics.increment("intent.keyword.hit")
+            return IntentResult(keyword_intent, 1.0, "keyword")
+        metrics.increment("intent.keyword.miss")
+
+        normalized = features.token_ids
+        cached = self.cache.get(normalized)
+        if cached is not None:
+            metrics.increment("intent.cache.hit")
+            return IntentResult(*cached, "cache")
+        metrics.increment("intent.cache.miss")
+
+        start = time.perf_counter()
+        intent, confidence = predict_intents_from_counts(features.intent_counts)[0]
+        metrics.observe("intent.model_ms", (time.perf_counter() - start) * 1000)
+        self.cache.set(normalized, (intent, confidence))
+        return IntentResult(intent, confidence, "model")
+
+
+intent_detector = IntentDetector()
+
+
+async def detect_intent(user_input: str, features: Optional[TurnFeatures] = None) -> IntentResult:
 
     print(f"Detecting intent for user input: {user_input}")
-    intent = predict_intent(user_input)
-    
-    return intent
\ No newline at end of file
+    result = intent_detector.detect(user_input, features)
+    if result.confidence < INTENT_MIN_CONFIDENCE:
+        metrics.increment("intent.low_confidence")
+
+    return result
@@ -0,0 +1,59 @@
+import threading
+from collections import defaultdict
+from typing import Any, Dict
+
+# ---------- In-process metrics, exposed on GET /metrics ---------- #
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+_gauges: Dict[str, float] = {}
+_timings: Dict[str, Dict[str, float]] = {}
+
+
+def increment(name: str, value: float = 1):
+    with _lock:
+        _counters[name] += value
+
+
+def set_gauge(name: str, value: float):
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name: str, value: float):
+    """Record one sample (e.g. a latency in ms); keeps count, sum and max."""
+    with _lock:
+        stats = _timings.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+        stats["count"] += 1
+        stats["sum"] += value
+        stats["max"] = max(stats["max"], value)
+
+
+def average(name: str) -> float:
+    """Mean of the samples recorded with observe(), 0.0 before the first one."""
+    with _lock:
+        stats = _timings.get(name)
+        return stats["sum"] / stats["count"] if stats and stats["count"] else 0.0
+
+
+def hit_ratio(prefix: str) -> float:
+    """Ratio of `<prefix>.hit` over `<prefix>.hit` + `<prefix>.miss`."""
+    with _lock:
+        hits = _counters.get(f"{prefix}.hit", 0)
+        misses = _counters.get(f"{prefix}.miss", 0)
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        timings = {
+            name: {**stats, "avg": stats["sum"] / stats["count"] if stats["count"] else 0.0}
+            for name, stats in _timings.items()
+        }
+        counters = dict(_counters)
+
+    # Every "<prefix>.hit" / "<prefix>.miss" pair is reported as a hit ratio
+    ratios = {
+        name[:-len(".hit")]: hit_ratio(name[:-len(".hit")])
+        for name in counters if name.endswith(".hit")
+    }
+    return {"counters": counters, "gauges": dict(_gauges), "timings": timings, "hit_ratios": ratios}
@@ -0,0 +1,37 @@
+from typing import Any, List
+
+import orjson
+
+
+class NDJSONStream:
+    """
+    Incremental newline-delimited JSON parser for streamed HTTP bodies.
+    Chunks are appended to one bytearray; complete lines are parsed in place
+    through a memoryview with orjson, and the consumed prefix is dropped once
+    per chunk, so every byte is copied and scanned a constant number of times.
+    Blank and malformed lines are skipped; a trailing line without a newline
+    is kept until the rest of it arrives.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.scan_from = 0   # bytes already searched for a newline
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Add a chunk and return every JSON value completed by it."""
+        self.buffer += chunk
+        values = []
+        start = 0
+        with memoryview(self.buffer) as view:
+            end = self.buffer.find(b"\n", self.scan_from)
+            while end >= 0:
+                try:
+                    values.append(orjson.loads(view[start:end]))
+                except orjson.JSONDecodeError:
+                    pass  # blank or malformed line
+                start = end + 1
+                end = self.buffer.find(b"\n", start)
+        # The view must be released before the bytearray can shrink
+        del self.buffer[:start]
+        self.scan_from = len(self.buffer)
+        return values
@@ -0,0 +1,17 @@
+import re
+import unicodedata
+
+_PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Fold a user question into a canonical key:
+    Unicode NFKC, case-folded, punctuation removed and whitespace collapsed.
+    "  What's the Breakfast time?? " -> "whats the breakfast time"
+    """
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = text.replace("'", "").replace("’", "")
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
@@ -0,0 +1,91 @@
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils import metrics
+from utils.text_normalizer import normalize_text
+
+
+class TurnFeatures:
+    """
+    Representations of one user message, shared by every helper a chat turn
+    calls (intent detection, FAQ search, answer cache, entity extraction).
+    Each one is computed on first use and at most once per turn: normalized
+    text, intent token counts/ids, query embedding, spaCy doc and regex matches.
+    Per feature, metrics count computations (turn_features.<name>.miss) and
+    reuses (.hit) and time the computation; log() prints the turn's summary.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.computed: Dict[str, float] = {}  # feature -> ms spent computing it
+        self.reused: Dict[str, int] = {}      # feature -> lookups served from this context
+        self._values: Dict[Any, Any] = {}
+
+    def _get(self, name: str, key: Any, compute: Callable[[], Any]) -> Any:
+        if key in self._values:
+            self._reuse(name)
+            return self._values[key]
+        start = time.perf_counter()
+        value = compute()
+        self._record(name, start)
+        self._values[key] = value
+        return value
+
+    def _reuse(self, name: str):
+        self.reused[name] = self.reused.get(name, 0) + 1
+        metrics.increment(f"turn_features.{name}.hit")
+
+    def _record(self, name: str, start: float):
+        elapsed = (time.perf_counter() - start) * 1000
+        self.computed[name] = self.computed.get(name, 0.0) + elapsed
+        metrics.increment(f"turn_features.{name}.miss")
+        metrics.observe(f"turn_features.{name}_ms", elapsed)
+
+    @property
+    def normalized(self) -> str:
+        """Case/punctuation/whitespace-folded text (utils.text_normalizer)."""
+        return self._get("normalized", "normalized", lambda: normalize_text(self.text))
+
+    @property
+    def intent_counts(self):
+        """1 x vocabulary CSR row of CountVectorizer token counts, the intent classifier's input."""
+        from models.intentModel import intent_counts
+        return self._get("intent_counts", "intent_counts", lambda: intent_counts([self.text]))
+
+    @property
+    def token_ids(self) -> Tuple[int, ...]:
+        """Sorted vocabulary ids of the words in the message, with repeats."""
+        from models.intentModel import token_ids_from_counts
+        return self._get("token_ids", "token_ids", lambda: token_ids_from_counts(self.intent_counts))
+
+    async def embedding(self) -> np.ndarray:
+        """Normalized MiniLM query vector, through the shared query embedding cache."""
+        if "embedding" in self._values:
+            self._reuse("embedding")
+            return self._values["embedding"]
+        from retrieval.query_cache import query_embedding_cache
+        start = time.perf_counter()
+        vector = await query_embedding_cache.get_embedding(self.text, normalized=self.normalized)
+        self._record("embedding", start)
+        self._values["embedding"] = vector
+        return vector
+
+    @property
+    def doc(self):
+        """spaCy parse with the booking entity ruler."""
+        from utils.extract_entities_for_booking_session import nlp
+        return self._get("spacy_doc", "spacy_doc", lambda: nlp(self.text))
+
+    def search(self, pattern: str, flags: int = 0) -> Optional[re.Match]:
+        return self._get("regex", ("search", pattern, flags), lambda: re.search(pattern, self.text, flags))
+
+    def findall(self, pattern: str, flags: int = 0) -> List[Any]:
+        return self._get("regex", ("findall", pattern, flags), lambda: re.findall(pattern, self.text, flags))
+
+    def log(self):
+        computed = ", ".join(f"{name} {ms:.1f}ms" for name, ms in self.computed.items()) or "none"
+        reused = ", ".join(f"{name} x{count}" for name, count in self.reused.items()) or "none"
+        print(f"[TURN FEATURES] computed: {computed}; reused: {reused}")